@@ -34,6 +34,7 @@ MOV_DESTINATIONS_V1 = ["pins", "x", "y", "pindirs", "exec", "pc", "isr", "osr"]
 MOV_SOURCES = ["pins", "x", "y", "null", None, "status", "isr", "osr"]
 MOV_OPS = [None, "~", "::", None]
 SET_DESTINATIONS = ["pins", "x", "y", None, "pindirs", None, None, None]
+CYCLE_OPERATORS = ("==", "!=", "<=", "<", ">=", ">")
 FIFO_TYPES = {
     "auto": 0,
     "txrx": 0,
@@ -63,7 +64,10 @@ class Program:
     """Settings from assembler directives to pass to the StateMachine constructor"""
 
     def __init__(self, text_program: str, *, build_debuginfo: bool = False) -> None:
-        """Converts pioasm text to encoded instruction bytes"""
+        """Converts pioasm text to encoded instruction bytes
+
+        ``.cycles`` directives are parsed but not checked; use
+        `adafruit_pioasm_host.Program` to check them."""
         assembled: List[int] = []
         program_name = None
         labels = {}
@@ -73,6 +77,7 @@ class Program:
         sideset_count = 0
         sideset_enable = 0
         sideset_pindirs = False
+        sideset_auto = False
         wrap = None
         wrap_target = None
         offset = -1
@@ -89,6 +94,7 @@ class Program:
         auto_pull = None
         pull_threshold = None
         set_count = None
+        cycle_checks = []
 
         def require_before_instruction():
             if len(instructions) != 0:
@@ -135,8 +141,14 @@ class Program:
                 if len(instructions) == 0:
                     raise RuntimeError("Cannot have .wrap as first instruction")
                 wrap = len(instructions) - 1
+            elif words[0] == ".cycles":
+                if len(words) != 5 or words[3] not in CYCLE_OPERATORS:
+                    raise RuntimeError(f"Invalid {line}")
+                cycle_checks.append((words[1], words[2], words[3], int(words[4], 0), line))
             elif line.startswith(".side_set"):
-                sideset_count = int(line.split()[1], 0)
+                sideset_auto = words[1] == "auto"
+                if not sideset_auto:
+                    sideset_count = int(line.split()[1], 0)
                 sideset_enable = "opt" in line
                 sideset_pindirs = "pindirs" in line
             elif line.startswith(".fifo"):
@@ -235,7 +247,27 @@ class Program:
         else:
             mov_destinations = MOV_DESTINATIONS_V0
 
+        if sideset_auto:
+            sideset_count, needs_enable = _choose_side_set(instructions)
+            sideset_enable = bool(sideset_count) and (sideset_enable or needs_enable)
+            if sideset_count + sideset_enable > 5:
+                raise RuntimeError(
+                    f"Side-set too wide: {sideset_count} pins"
+                    + (" and optional" if sideset_enable else "")
+                    + " exceed the 5 bits available"
+                )
         max_delay = 2 ** (5 - sideset_count - sideset_enable) - 1
+        if sideset_auto:
+            instructions, linemap, index_map = _spill_delays(
+                instructions, linemap, max_delay, sideset_enable
+            )
+            for table in (labels, public_labels):
+                for label, index in table.items():
+                    table[label] = index_map[index]
+            if wrap is not None:
+                wrap = index_map[wrap + 1] - 1
+            if wrap_target is not None:
+                wrap_target = index_map[wrap_target]
         assembled = []
         for line in instructions:
             instruction = splitter(line.strip())
@@ -501,6 +533,14 @@ class Program:
 
         self.public_labels = public_labels
 
+        self._labels = labels
+
+        for start, end, _, _, _ in cycle_checks:
+            for label in (start, end):
+                if label not in labels:
+                    raise SyntaxError(f"Invalid .cycles label {repr(label)}")
+        self._cycle_checks = cycle_checks
+
     @classmethod
     def from_file(cls, filename: str, **kwargs) -> "Program":
         """Assemble a PIO program in a file"""
@@ -535,9 +575,9 @@ class Program:
                     if line:
                         print(f"            // {line}")
                     last_line += 1
-                line = program_lines[last_line]
+                line = program_lines[next_line]
                 print(f"    0x{inst:04x}, // {line}")
-                last_line += 1
+                last_line = max(last_line, next_line + 1)
             while last_line < len(program_lines):
                 line = program_lines[last_line]
                 if line:
@@ -550,6 +590,77 @@ class Program:
         print()
 
 
+def _side_and_delay(line: str) -> tuple:
+    """Return the side-set value (or None) and delay written on an instruction line"""
+    instruction = splitter(line.strip())
+    delay = 0
+    if len(instruction) > 1 and instruction[-1].startswith("[") and instruction[-1].endswith("]"):
+        delay = int(instruction[-1].strip("[]"), 0)
+        instruction.pop()
+    if len(instruction) > 2 and instruction[-2] == "side":
+        return int(instruction[-1], 0), delay
+    return None, delay
+
+
+def _choose_side_set(instructions: List[str]) -> tuple:
+    """Return the smallest side-set pin count, and whether side-set must be optional"""
+    values = [_side_and_delay(line)[0] for line in instructions]
+    used = [value for value in values if value is not None]
+    if not used:
+        return 0, False
+    return max(1, max(used).bit_length()), None in values
+
+
+def _spill_delays(
+    instructions: List[str], linemap: List[int], max_delay: int, sideset_enable: bool
+) -> tuple:
+    """Move delay that does not fit in the delay field into ``nop`` instructions
+
+    Return the new instructions and line map, and a list mapping each old
+    instruction index (and the end of the program) to its new index."""
+    new_instructions = []
+    new_linemap = []
+    index_map = []
+    for line, line_number in zip(instructions, linemap):
+        index_map.append(len(new_instructions))
+        side_set, delay = _side_and_delay(line)
+        words = splitter(line.strip())
+        new_instructions.append(line)
+        new_linemap.append(line_number)
+        # Delay after a jump only happens on the path that falls through, so
+        # these are left for the assembler to diagnose
+        if (
+            delay <= max_delay
+            or words[0] == "jmp"
+            or (words[0] in {"out", "mov"} and words[1] in {"pc", "exec"})
+        ):
+            continue
+        new_instructions[-1] = f"{line[: line.rindex('[')]}[{max_delay}]"
+        remaining = delay - max_delay
+        side = "" if sideset_enable or side_set is None else f" side {side_set}"
+        while remaining > 0:
+            nop_delay = min(remaining - 1, max_delay)
+            new_instructions.append(f"nop{side} [{nop_delay}]")
+            new_linemap.append(line_number)
+            remaining -= nop_delay + 1
+    index_map.append(len(new_instructions))
+    # Numeric jump targets refer to the old instruction indices
+    for i, line in enumerate(new_instructions):
+        words = splitter(line.strip())
+        if words[0] != "jmp":
+            continue
+        end = len(words)
+        if words[-1].startswith("["):
+            end -= 1
+        if end > 2 and words[end - 2] == "side":
+            end -= 2
+        target = words[end - 1]
+        if target[:1] in "0123456789" and int(target, 0) < len(index_map):
+            words[end - 1] = str(index_map[int(target, 0)])
+            new_instructions[i] = " ".join(words)
+    return new_instructions, new_linemap, index_map
+
+
 def assemble(program_text: str) -> array.array:
     """Converts pioasm text to encoded instruction bytes
 
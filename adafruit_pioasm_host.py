@@ -0,0 +1,1708 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+"""
+`adafruit_pioasm_host`
+================================================================================
+
+Analysis, optimization and linking of PIO programs
+
+These are meant for use on a host computer, when writing and checking PIO
+programs. They are kept out of `adafruit_pioasm`, which is imported on the
+microcontroller to assemble programs at run time.
+"""
+
+try:
+    from typing import Any, List, Sequence
+except ImportError:
+    pass
+
+import argparse
+import array
+import heapq
+import os
+import sys
+
+import adafruit_pioasm
+
+CYCLE_COMPARISONS = {
+    "==": lambda cycles, limit: cycles == limit,
+    "!=": lambda cycles, limit: cycles != limit,
+    "<=": lambda cycles, limit: cycles <= limit,
+    "<": lambda cycles, limit: cycles < limit,
+    ">=": lambda cycles, limit: cycles >= limit,
+    ">": lambda cycles, limit: cycles > limit,
+}
+OPTIMIZATION_PASSES = {
+    1: ("remove_unreachable", "fold_nops"),
+    2: ("thread_jumps", "remove_unreachable", "infer_wrap", "fold_nops"),
+}
+
+
+class Program(adafruit_pioasm.Program):
+    """An `adafruit_pioasm.Program` with timing analysis and optimization
+
+    Example::
+
+        program = adafruit_pioasm_host.Program(...)
+        print(program.solve_frequency(800_000))
+
+    """
+
+    optimization_report: "str | None"
+    """The report from `optimize`, if an optimization level was given when assembling"""
+
+    def __init__(
+        self, text_program: str, *, build_debuginfo: bool = False, optimize: int = 0
+    ) -> None:
+        """Converts pioasm text to encoded instruction bytes, and checks ``.cycles`` directives
+
+        If ``optimize`` is nonzero, `optimize` is called with it as the level
+        and its report is stored in `optimization_report`."""
+        super().__init__(text_program, build_debuginfo=build_debuginfo)
+        self._cfg = None
+        self._check_cycles()
+        self.optimization_report = self.optimize(optimize) if optimize else None
+
+    def _check_cycles(self) -> None:
+        for start, end, comparison, limit, line in self._cycle_checks:
+            for label in (start, end):
+                if label not in self._labels:
+                    raise RuntimeError(f"Label {label} was removed as unreachable, for {line}")
+            if self._loops_before(self._labels[start], self._labels[end]):
+                raise RuntimeError(f"A path from {start} to {end} goes around a loop, for {line}")
+            paths = [path for path in self.cycle_paths(start, end) if path.end is not None]
+            if not paths:
+                raise RuntimeError(f"No path from {start} to {end} for {line}")
+            for path in paths:
+                if not CYCLE_COMPARISONS[comparison](path.cycles, limit):
+                    raise RuntimeError(
+                        f"Path {path.addresses} takes {path.cycles} cycles, violating {line}"
+                    )
+
+    def _loops_before(self, start: int, end: int) -> bool:
+        """Return True if a path from ``start`` can go around a loop before reaching ``end``
+
+        The paths from `cycle_paths` visit each instruction once, so they
+        do not give the cycles of such a path. Returning to ``start`` begins
+        a new path rather than counting as a loop."""
+
+        def successors(address):
+            return [nxt for nxt in self._next_addresses(address)[0] if nxt not in {start, end}]
+
+        reachable = set()
+        pending = [start]
+        while pending:
+            address = pending.pop()
+            if address not in reachable:
+                reachable.add(address)
+                pending.extend(successors(address))
+        # Only loops on the way to ``end`` matter
+        leads = set()
+        changed = True
+        while changed:
+            changed = False
+            for address in reachable - leads:
+                if end in self._next_addresses(address)[0] or leads.intersection(
+                    successors(address)
+                ):
+                    leads.add(address)
+                    changed = True
+
+        active, done = set(), set()
+
+        def visit(address):
+            if address in active:
+                return True
+            if address in done:
+                return False
+            active.add(address)
+            found = any(visit(nxt) for nxt in successors(address) if nxt in leads)
+            active.remove(address)
+            done.add(address)
+            return found
+
+        return start in leads and visit(start)
+
+    def _delete_instruction(self, address: int) -> None:
+        """Remove one instruction, moving later addresses down to close the gap
+
+        Jump targets, labels and wrap settings after ``address`` are updated.
+        The caller must ensure nothing still jumps to ``address``."""
+        del self.assembled[address]
+        for i, word in enumerate(self.assembled):
+            if word >> 13 == 0 and word & 0x1F > address:
+                self.assembled[i] = word - 1
+        for labels in (self._labels, self.public_labels):
+            for label, label_address in labels.items():
+                if label_address > address:
+                    labels[label] = label_address - 1
+        for key in ("wrap", "wrap_target"):
+            if self.pio_kwargs.get(key, -1) > address or (
+                key == "wrap" and self.pio_kwargs.get(key) == address and address > 0
+            ):
+                self.pio_kwargs[key] -= 1
+        if self.debuginfo is not None:
+            del self.debuginfo[0][address]
+        self._cfg = None
+
+    def _delay_bits(self) -> int:
+        return 5 - self.pio_kwargs.get("sideset_pin_count", 0) - self.pio_kwargs["sideset_enable"]
+
+    def _jump_targets(self) -> set:
+        return {word & 0x1F for word in self.assembled if word >> 13 == 0}
+
+    def fold_nops(self) -> int:
+        """Merge ``nop`` instructions into the delay of the instruction before them
+
+        A ``nop`` is merged when it is only reached by falling through from
+        the previous instruction, carries no label, does not change the
+        side-set pins, and the combined delay fits in the delay field.
+        Timing is unchanged. Return the number of instruction slots saved."""
+        if any(self._next_addresses(a)[1] for a in range(len(self.assembled))):
+            return 0  # a computed jump could land on any nop
+        delay_mask = (1 << self._delay_bits()) - 1
+        saved = 0
+        address = 1
+        while address < len(self.assembled):
+            word = self.assembled[address]
+            previous = address - 1
+            delay, side_set = self._delay_and_side_set(address)
+            previous_delay, previous_side_set = self._delay_and_side_set(previous)
+            if (
+                word & 0xE0FF == 0xA042  # nop, which is mov y, y
+                and self._next_addresses(previous) == ([address], False)
+                and self.assembled[previous] >> 13 != 0
+                and address not in self._jump_targets()
+                and address not in self._labels.values()
+                and address != self.pio_kwargs.get("wrap_target", 0)
+                and side_set in {None, previous_side_set}
+                and previous_delay + delay + 1 <= delay_mask
+            ):
+                self.assembled[previous] += (delay + 1) << 8
+                self._delete_instruction(address)
+                saved += 1
+            else:
+                address += 1
+        return saved
+
+    def infer_wrap(self) -> int:
+        """Replace a trailing unconditional backward ``jmp`` with ``.wrap`` settings
+
+        The wrap happens for free, so each pass around the loop becomes one
+        cycle shorter and one instruction slot is saved. Any delay on the
+        ``jmp`` is moved to the instruction before it. Return the number of
+        cycles saved on each pass around the loop, or 0 if the program was
+        not changed."""
+        jump = self.pio_kwargs.get("wrap", len(self.assembled) - 1)
+        if jump < 1:
+            return 0
+        word = self.assembled[jump]
+        target = word & 0x1F
+        previous = jump - 1
+        delay, side_set = self._delay_and_side_set(jump)
+        previous_delay, previous_side_set = self._delay_and_side_set(previous)
+        if (
+            word >> 13 != 0
+            or (word >> 5) & 7
+            or target >= jump
+            or jump in self.cfg().entries
+            or any(
+                self.assembled[a] >> 13 == 0 and self.assembled[a] & 0x1F == jump
+                for a in range(len(self.assembled))
+                if a != jump
+            )
+            or jump not in self._next_addresses(previous)[0]
+            or self._next_addresses(previous)[1]
+            or side_set not in {None, previous_side_set}
+            or previous_delay + delay >= 1 << self._delay_bits()
+            or (delay and len(self._next_addresses(previous)[0]) > 1)
+        ):
+            return 0
+        self.assembled[previous] += delay << 8
+        self._delete_instruction(jump)
+        self.pio_kwargs["wrap"] = previous
+        self.pio_kwargs["wrap_target"] = target
+        return 1
+
+    def thread_jumps(self) -> int:
+        """Point jumps that land on an unconditional ``jmp`` at its final destination
+
+        Each threaded jump skips the intermediate ``jmp``, saving its cycle.
+        A ``jmp`` with a delay, or that changes the side-set pins, is not
+        skipped. Return the number of jumps changed."""
+        changed = 0
+        for address, word in enumerate(self.assembled):
+            if word >> 13 != 0:
+                continue
+            side_set = self._delay_and_side_set(address)[1]
+            target = word & 0x1F
+            seen = set()
+            while target not in seen and target < len(self.assembled):
+                next_word = self.assembled[target]
+                if next_word >> 13 != 0 or (next_word >> 5) & 7:
+                    break
+                delay, target_side_set = self._delay_and_side_set(target)
+                if delay or target_side_set not in {None, side_set}:
+                    break
+                seen.add(target)
+                target = next_word & 0x1F
+            if target != word & 0x1F and target not in seen:
+                self.assembled[address] = (word & ~0x1F) | target
+                changed += 1
+        if changed:
+            self._cfg = None
+        return changed
+
+    def remove_unreachable(self) -> int:
+        """Delete instructions that cannot be reached from the entry points or wrap target
+
+        Addresses are compacted, and jumps, public labels and wrap settings
+        are updated to match. Labels on the removed instructions are
+        dropped. Programs with computed jumps (``out pc``,
+        ``mov pc``, ``out exec``, ``mov exec``) are left unchanged. Return the
+        number of instruction slots saved."""
+        if any(self._next_addresses(a)[1] for a in range(len(self.assembled))):
+            return 0
+        reachable = set()
+        pending = self.cfg().entries + [self.pio_kwargs.get("wrap_target", 0)]
+        while pending:
+            address = pending.pop()
+            if address not in reachable:
+                reachable.add(address)
+                pending.extend(self._next_addresses(address)[0])
+        unreachable = [a for a in range(len(self.assembled)) if a not in reachable]
+        for label in [label for label, a in self._labels.items() if a in unreachable]:
+            del self._labels[label]
+        for address in reversed(unreachable):
+            self._delete_instruction(address)
+        return len(unreachable)
+
+    def promote_set_pins(self) -> int:
+        """Merge ``set pins`` instructions into side-set on the following instruction
+
+        This only applies to programs that do not already use side-set. A
+        ``set pins`` without delay, which only falls through to an
+        instruction that nothing else jumps to and that does not write the
+        pins itself, is removed and its value is side-set on the next
+        instruction instead. The side-set width is the ``.set`` pin count,
+        or 1 if there is no ``.set`` directive. ``.side_set <n> opt`` is
+        added to `pio_kwargs`, so the side-set pins must be mapped to the
+        same pins as the set pins (``first_sideset_pin=first_set_pin``)
+        when constructing the ``StateMachine``.
+
+        Each merge saves one instruction slot and one cycle, and the pins
+        change one cycle earlier relative to the following instructions.
+        Nothing is changed if the existing delays would not fit alongside
+        the side-set bits. Return the number of instructions merged."""
+        if self.pio_kwargs.get("sideset_pin_count"):
+            return 0
+        jump_targets = self._jump_targets()
+        blocked = jump_targets | set(self.cfg().entries) | {self.pio_kwargs.get("wrap_target", 0)}
+        candidates = {
+            address
+            for address, word in enumerate(self.assembled)
+            if word & 0xFFE0 == 0xE000  # set pins without delay
+            and self._next_addresses(address) == ([address + 1], False)
+            and address + 1 not in blocked
+        }
+        # Side-set takes priority over a pin write in the same instruction,
+        # so the next instruction must not write the pins itself.
+        candidates = sorted(
+            address
+            for address in candidates
+            if address + 1 not in candidates and not _writes_pins(self.assembled[address + 1])
+        )
+        if not candidates:
+            return 0
+        count = self.pio_kwargs.get("set_pin_count", 1)
+        if count > 4 or any(((word >> 8) & 0x1F) >> (4 - count) for word in self.assembled):
+            return 0
+
+        for address in reversed(candidates):
+            value = self.assembled[address] & ((1 << count) - 1)
+            self.assembled[address + 1] |= (0x10 | value << (4 - count)) << 8
+            self._delete_instruction(address)
+        self.pio_kwargs["sideset_enable"] = True
+        self.pio_kwargs["sideset_pin_count"] = count
+        return len(candidates)
+
+    def _register_live(self, register: str, address: int) -> bool:
+        """Return True if ``register`` may be read before it is written, starting at ``address``"""
+        seen = set()
+        pending = [address]
+        while pending:
+            address = pending.pop()
+            if address in seen:
+                continue
+            seen.add(address)
+            word = self.assembled[address]
+            successors, computed = self._next_addresses(address)
+            if computed or register in _reads(word):
+                return True
+            if register not in _writes(word):
+                pending.extend(successors)
+        return False
+
+    def unroll_loops(
+        self, free_slots: int, *, exact: bool = True, system_clock: int = 125_000_000
+    ) -> List[tuple]:
+        """Unroll counted loops into spare instruction slots
+
+        A loop is unrolled when it is a straight run of instructions ending in
+        ``jmp x--`` or ``jmp y--`` back to its start, its trip count is a
+        known constant (see `loop_bounds`), the counter is not otherwise used,
+        and the unrolled copies fit in the ``free_slots`` not yet used by
+        other unrolled loops.
+
+        If ``exact`` is True, the cycles of the removed ``jmp`` are added to
+        the delay of each copy (with a ``nop`` if they do not fit) so timing
+        is unchanged. Otherwise the ``jmp``'s own cycle is dropped, so each
+        iteration is one cycle shorter and the same rate can be reached at a
+        lower clock, or a higher rate at the same clock. A loop is not
+        unrolled if this would lose the side-set of the ``jmp``.
+
+        Return ``(address, old_rate, new_rate)`` for each loop unrolled,
+        giving the highest iteration rate (e.g. bit rate) of the loop at
+        ``system_clock`` before and after."""
+        delay_mask = (1 << self._delay_bits()) - 1
+        sideset_enable = self.pio_kwargs["sideset_enable"]
+        results = []
+        for header, trips in sorted(self.loop_bounds().items(), reverse=True):
+            cfg = self.cfg()
+            block = cfg.block_at(header)
+            counter = block.end
+            word = self.assembled[counter]
+            register = "x" if (word >> 5) & 7 == 2 else "y"
+            body = list(self.assembled[header:counter])
+            if (
+                cfg.loops[header] != [header]
+                or word & 0x1F != header
+                or not body
+                or any(w >> 13 == 0 or register in _reads(w) | _writes(w) for w in body)
+                or any(
+                    self._register_live(register, following)
+                    for following in self._next_addresses(counter)[0]
+                    if following != header
+                )
+            ):
+                continue
+            old_cycles = self.loop_cycles(header)[0]
+            lines = None if self.debuginfo is None else self.debuginfo[0][header:counter]
+            jump_delay, jump_side_set = self._delay_and_side_set(counter)
+            extra = jump_delay + 1 if exact else jump_delay
+            last_delay, last_side_set = self._delay_and_side_set(counter - 1)
+            if jump_side_set in {None, last_side_set} and last_delay + extra <= delay_mask:
+                body[-1] += extra << 8
+            elif not extra:
+                continue  # nowhere to keep the jmp's side-set
+            else:
+                field = extra - 1
+                if jump_side_set is not None:
+                    field |= (jump_side_set << self._delay_bits()) | (sideset_enable << 4)
+                body.append(0xA042 | field << 8)
+                if lines is not None:
+                    lines.append(self.debuginfo[0][counter])
+            growth = len(body) * trips - (counter + 1 - header)
+            if growth > free_slots:
+                continue
+            free_slots -= growth
+            self._replace_instructions(header, counter, body * trips, lines and lines * trips)
+            new_cycles = old_cycles if exact else old_cycles - 1
+            results.append((header, system_clock / old_cycles, system_clock / new_cycles))
+        return results
+
+    def _replace_instructions(
+        self, start: int, end: int, words: List[int], lines: "List[int] | None"
+    ) -> None:
+        """Replace the straight-line instructions ``start`` to ``end`` (inclusive) with ``words``
+
+        Only ``start`` may be the target of a jump or label. ``lines`` gives
+        the source line of each new word, for the debug information."""
+        delta = len(words) - (end + 1 - start)
+
+        def moved(address):
+            return address + delta if address > end else min(address, start)
+
+        for i, word in enumerate(self.assembled):
+            if word >> 13 == 0:
+                self.assembled[i] = (word & ~0x1F) | moved(word & 0x1F)
+        for labels in (self._labels, self.public_labels):
+            for label, label_address in labels.items():
+                labels[label] = moved(label_address)
+        if "wrap_target" in self.pio_kwargs:
+            self.pio_kwargs["wrap_target"] = moved(self.pio_kwargs["wrap_target"])
+        if "wrap" in self.pio_kwargs:
+            wrap = self.pio_kwargs["wrap"]
+            self.pio_kwargs["wrap"] = wrap + delta if wrap >= end else wrap
+        if self.debuginfo is not None:
+            self.debuginfo[0][start : end + 1] = lines
+        self.assembled[start : end + 1] = array.array("H", words)
+        self._cfg = None
+
+    def _loop_timing(self) -> dict[str, List[int]]:
+        cfg = self.cfg()
+        return {
+            label: self.loop_cycles(label)
+            for label, address in self._labels.items()
+            if address < len(self.assembled) and address in cfg.loops
+        }
+
+    def optimize(self, level: int = 1) -> str:
+        """Run a pipeline of optimization passes and return a report of the changes
+
+        Level 1 runs `remove_unreachable` and `fold_nops`, which do not change
+        timing. Level 2 adds `thread_jumps` and `infer_wrap`, which make some
+        paths shorter. The passes run until none of them changes the program.
+        ``.cycles`` directives are checked again afterwards, so they can be
+        used to guard the timing that matters."""
+        if level not in OPTIMIZATION_PASSES:
+            raise ValueError(f"Invalid optimization level {level}")
+        before_length = len(self.assembled)
+        before_loops = self._loop_timing()
+
+        totals = dict.fromkeys(OPTIMIZATION_PASSES[level], 0)
+        changed = True
+        while changed:
+            changed = False
+            for name in OPTIMIZATION_PASSES[level]:
+                result = getattr(self, name)()
+                totals[name] += result
+                changed = changed or bool(result)
+        self._check_cycles()
+
+        after_loops = self._loop_timing()
+        report = [f"{name}: {count}" for name, count in totals.items()]
+        report.append(f"instructions: {before_length} -> {len(self.assembled)}")
+        for label, cycles in before_loops.items():
+            after = after_loops.get(label)
+            after_text = "-" if after is None else ", ".join(str(c) for c in after)
+            report.append(
+                f"loop {label}: {', '.join(str(c) for c in cycles)} -> {after_text} cycles"
+            )
+        return "\n".join(report)
+
+    def cfg(self) -> "ControlFlowGraph":
+        """Return the control-flow graph of the program
+
+        The graph is computed the first time it is requested and cached on
+        the program, so analyses can share it."""
+        if self._cfg is None:
+            self._cfg = ControlFlowGraph(self)
+        return self._cfg
+
+    def relocatable(self) -> "RelocatableProgram":
+        """Return the program with a record of the fields that hold addresses
+
+        Use `RelocatableProgram.relocate` to patch the program for any load
+        address without assembling it again."""
+        return RelocatableProgram(self)
+
+    def _next_addresses(self, address: int) -> tuple:
+        length = len(self.assembled)
+        return _successors(
+            self.assembled[address],
+            address,
+            self.pio_kwargs.get("wrap", length - 1),
+            self.pio_kwargs.get("wrap_target", 0),
+            length,
+        )
+
+    def _delay_and_side_set(self, address: int) -> tuple:
+        """Return the delay of the instruction at ``address``, and its side-set value or None"""
+        sideset_count = self.pio_kwargs.get("sideset_pin_count", 0)
+        sideset_enable = self.pio_kwargs["sideset_enable"]
+        delay_bits = 5 - sideset_count - sideset_enable
+        field = (self.assembled[address] >> 8) & 0x1F
+        delay = field & ((1 << delay_bits) - 1)
+        if sideset_count == 0 or (sideset_enable and not field & 0x10):
+            return delay, None
+        return delay, (field >> delay_bits) & ((1 << sideset_count) - 1)
+
+    def _may_stall(self, address: int) -> bool:
+        """Return True if the instruction at ``address`` can block the state machine"""
+        word = self.assembled[address]
+        opcode = word >> 13
+        if opcode == 1:  # wait
+            return True
+        if opcode == 2:  # in
+            return bool(self.pio_kwargs.get("auto_push"))
+        if opcode == 3:  # out
+            return bool(self.pio_kwargs.get("auto_pull"))
+        if opcode == 4:  # push, pull
+            return not word & 0x10 and bool(word & 0x20)
+        if opcode == 6:  # irq
+            return bool(word & 0x20)
+        return False
+
+    def _address(self, where: "str | int") -> int:
+        if isinstance(where, int):
+            return where
+        if where not in self._labels:
+            raise ValueError(f"Unknown label {repr(where)}")
+        return self._labels[where]
+
+    def _name(self, address: "int | None") -> str:
+        if address is None:
+            return "(end)"
+        for label, label_address in self._labels.items():
+            if label_address == address:
+                return label
+        return str(address)
+
+    def _walk(self, start: int, stop, side_set: "int | None" = None) -> List["TimingPath"]:
+        """Enumerate the loop-free paths from ``start`` until ``stop(address)`` is true"""
+        paths = []
+        stack = [[start]]
+        while stack:
+            path = stack.pop()
+            successors, computed = self._next_addresses(path[-1])
+            ends = [nxt for nxt in successors if stop(nxt)]
+            if computed or not successors:
+                ends.append(None)
+            for end in ends:
+                paths.append(TimingPath(self, path, end, side_set))
+            stack.extend(
+                path + [nxt] for nxt in reversed(successors) if not stop(nxt) and nxt not in path
+            )
+        return paths
+
+    def cycle_paths(
+        self, start: "str | int | None" = None, end: "str | int | None" = None
+    ) -> List["TimingPath"]:
+        """Return the timing of each path between labels
+
+        ``start`` and ``end`` are label names or instruction addresses. By
+        default paths begin at each label, the program start and the wrap
+        target, and stop at the next of those points. A path also stops
+        where a computed jump or the end of the program is reached."""
+        boundaries = set(self._labels.values())
+        boundaries.update((0, self.pio_kwargs.get("wrap_target", 0)))
+        if end is not None:
+            boundaries = {self._address(end)}
+        if start is None:
+            starts = sorted(boundary for boundary in boundaries if boundary < len(self.assembled))
+        else:
+            starts = [self._address(start)]
+        paths = []
+        for address in starts:
+            paths.extend(self._walk(address, boundaries.__contains__))
+        return paths
+
+    def side_set_paths(self) -> List["TimingPath"]:
+        """Return the timing of each path that holds one side-set value
+
+        Each path starts at an instruction that may change the side-set
+        pins and stops at the next instruction that sets a different value,
+        so its cycle count is the width of a pulse on the side-set pins."""
+        side_sets = [self._delay_and_side_set(i)[1] for i in range(len(self.assembled))]
+        predecessors = [[] for _ in side_sets]
+        for address in range(len(side_sets)):
+            for nxt in self._next_addresses(address)[0]:
+                predecessors[nxt].append(address)
+
+        paths = []
+        for address, value in enumerate(side_sets):
+            if value is None:
+                continue
+            if predecessors[address] and all(side_sets[p] == value for p in predecessors[address]):
+                continue
+            paths.extend(
+                self._walk(
+                    address, lambda nxt, value=value: side_sets[nxt] not in {None, value}, value
+                )
+            )
+        return paths
+
+    def loop_cycles(self, loop: "str | int | None" = None) -> List[int]:
+        """Return the cycle counts of the paths once around a loop
+
+        ``loop`` is a label or address in the loop. By default the innermost
+        loop that contains an ``in`` or ``out`` instruction is used, which
+        is the bit loop of most serial protocols."""
+        cfg = self.cfg()
+        if loop is None:
+            candidates = []
+            for header in cfg.loops:
+                addresses = cfg.loop_addresses(header)
+                if any(self.assembled[a] >> 13 in {2, 3} for a in addresses):
+                    candidates.append((len(addresses), header))
+            if not candidates:
+                raise ValueError("No loop containing in or out found")
+            header = min(candidates)[1]
+        else:
+            header = cfg.block_at(self._address(loop)).start
+            if header not in cfg.loops:
+                raise ValueError(f"{repr(loop)} is not in a loop")
+        body = cfg.loop_addresses(header)
+        return sorted(
+            path.cycles
+            for path in self.cycle_paths(header, header)
+            if body.issuperset(path.addresses)
+        )
+
+    def solve_frequency(
+        self,
+        rate: float,
+        system_clock: int = 125_000_000,
+        *,
+        loop: "str | int | None" = None,
+        cycles: "int | None" = None,
+    ) -> "ClockSolution":
+        """Choose the state machine clock divider for a loop rate
+
+        ``rate`` is the desired number of loop iterations per second, such as
+        a bit rate or sample rate. The cycles per iteration are found with
+        `loop_cycles`, unless given as ``cycles``. The best divider available
+        to the hardware (16 integer bits and 8 fractional bits) is chosen."""
+        if cycles is None:
+            all_cycles = self.loop_cycles(loop)
+        else:
+            all_cycles = [cycles]
+        return ClockSolution(rate, system_clock, all_cycles)
+
+    def _counted_loops(self) -> dict:
+        """Find loops counted down by a single ``jmp x--`` or ``jmp y--``
+
+        Return a dict mapping each loop header to the counter register, the
+        cycles per count, the cycles of the final pass and the exit address."""
+        cfg = self.cfg()
+        loops = {}
+        for header in cfg.loops:
+            body = cfg.loop_addresses(header)
+            if any(self._next_addresses(a)[1] for a in body):
+                continue
+            exits = [
+                (a, n) for a in sorted(body) for n in self._next_addresses(a)[0] if n not in body
+            ]
+            if len(exits) != 1:
+                continue
+            counter, exit_address = exits[0]
+            word = self.assembled[counter]
+            condition = (word >> 5) & 7
+            if word >> 13 != 0 or condition not in {2, 4} or word & 0x1F not in body:
+                continue
+            register = "x" if condition == 2 else "y"
+            if any(register in _writes(self.assembled[a]) for a in body if a != counter):
+                continue
+            around = [p for p in self.cycle_paths(header, header) if body.issuperset(p.addresses)]
+            final = [
+                p for p in self.cycle_paths(header, exit_address) if body.issuperset(p.addresses)
+            ]
+            if (
+                len({p.cycles for p in around}) != 1
+                or len({p.cycles for p in final}) != 1
+                or not all(counter in p.addresses for p in around)
+            ):
+                continue
+            loops[header] = (register, around[0].cycles, final[0].cycles, exit_address)
+        return loops
+
+    def cycle_formulas(
+        self, start: "str | int | None" = None, end: "str | int | None" = None
+    ) -> List["CycleFormula"]:
+        """Return the cycles along each path as a formula in the loop counter values
+
+        A loop that exits through a single ``jmp x--`` or ``jmp y--``, and
+        does not otherwise change that register, takes a number of cycles
+        proportional to the register's value when the loop is entered. Each
+        such loop on a path contributes one term to the formula.
+
+        Any other loop depends on data the program cannot see, such as a pin
+        or a register loaded from the FIFO. A path through such a loop is
+        returned once, with the cycles of a single pass around the loop, and
+        is marked `CycleFormula.data_dependent`; paths that leave the loop
+        after going around it more than once are not listed.
+
+        By default the paths start at the wrap target; ``end`` defaults to
+        ``start``, giving the cycles for one pass around the program."""
+        if start is None:
+            start = self.pio_kwargs.get("wrap_target", 0)
+        start = self._address(start)
+        end = start if end is None else self._address(end)
+        counted = self._counted_loops()
+        graph = {}
+        for address in range(len(self.assembled)):
+            if address in counted:
+                successors = [counted[address][3]]
+            else:
+                successors = self._next_addresses(address)[0]
+            graph[address] = [n for n in successors if n != end]
+        looping = set()
+        for address in graph:
+            seen, todo = set(), list(graph[address])
+            while todo:
+                nxt = todo.pop()
+                if nxt not in seen:
+                    seen.add(nxt)
+                    todo.extend(graph[nxt])
+            if address in seen:
+                looping.add(address)
+
+        formulas = []
+        stack = [(start, [], 0, [], self.register_values()[start] or (None, None))]
+        while stack:
+            address, path, constant, terms, values = stack.pop()
+            path = path + [address]
+            if address in counted:
+                register, per_count, final, exit_address = counted[address]
+                index = "xy".index(register)
+                if values[index] is None:
+                    source = None
+                    for previous in reversed(path[:-1]):
+                        if register in _writes(self.assembled[previous]):
+                            source = previous
+                            break
+                    terms = terms + [(register, per_count, source)]
+                else:
+                    constant += per_count * values[index]
+                constant += final
+                values = list(values)
+                values[index] = 0xFFFFFFFF  # the counter wraps as the loop exits
+                edges, computed = [(exit_address,) + tuple(values)], False
+            else:
+                constant += 1 + self._delay_and_side_set(address)[0]
+                edges = self._register_step(address, values)
+                computed = self._next_addresses(address)[1]
+            if computed or not edges:
+                formulas.append(CycleFormula(path, None, constant, terms))
+            for nxt, x, y in reversed(edges):
+                if nxt == end:
+                    formulas.append(CycleFormula(path, end, constant, terms))
+                elif nxt not in path:
+                    stack.append((nxt, path, constant, terms, (x, y)))
+        for formula in formulas:
+            formula.data_dependent = not looping.isdisjoint(formula.addresses)
+        return formulas
+
+    def _register_step(self, address: int, values: tuple) -> List[tuple]:
+        """Execute one instruction with the given known X and Y values (None if unknown)
+
+        Return ``(next_address, x, y)`` for each edge that may be taken."""
+        word = self.assembled[address]
+        opcode = word >> 13
+        destination = (word >> 5) & 7
+        x, y = values
+        successors, computed = self._next_addresses(address)
+        if opcode == 0 and destination:  # conditional jmp
+            target = word & 0x1F
+            length = len(self.assembled)
+            following = address + 1
+            if address == self.pio_kwargs.get("wrap", length - 1):
+                following = self.pio_kwargs.get("wrap_target", 0)
+            if destination == 1:  # !x
+                edges = (
+                    [(target, 0, y), (following, x, y)]
+                    if x is None
+                    else [(target if x == 0 else following, x, y)]
+                )
+            elif destination == 2:  # x--
+                if x is None:
+                    edges = [(target, None, y), (following, 0xFFFFFFFF, y)]
+                else:
+                    edges = [(target if x else following, (x - 1) & 0xFFFFFFFF, y)]
+            elif destination == 3:  # !y
+                edges = (
+                    [(target, x, 0), (following, x, y)]
+                    if y is None
+                    else [(target if y == 0 else following, x, y)]
+                )
+            elif destination == 4:  # y--
+                if y is None:
+                    edges = [(target, x, None), (following, x, 0xFFFFFFFF)]
+                else:
+                    edges = [(target if y else following, x, (y - 1) & 0xFFFFFFFF)]
+            elif destination == 5 and x is not None and y is not None:  # x!=y
+                edges = [(target if x != y else following, x, y)]
+            else:
+                edges = [(target, x, y), (following, x, y)]
+            return [edge for edge in edges if edge[0] in successors]
+
+        value = None
+        if opcode == 7:  # set
+            value = word & 0x1F
+        elif opcode == 5 and destination in {1, 2}:  # mov x, mov y
+            value = {1: x, 2: y, 3: 0}.get(word & 7)
+            operation = (word >> 3) & 3
+            if value is not None and operation == 1:
+                value ^= 0xFFFFFFFF
+            elif value is not None and operation == 2:
+                value = int(f"{value:032b}"[::-1], 2)
+        if computed:
+            x = y = None
+        elif opcode in {3, 5, 7} and destination == 1:
+            x = value
+        elif opcode in {3, 5, 7} and destination == 2:
+            y = value
+        return [(nxt, x, y) for nxt in successors]
+
+    def register_values(self) -> List["tuple | None"]:
+        """Return the X and Y values known on entry to each instruction
+
+        Each entry is an ``(x, y)`` tuple, where a register is None unless it
+        holds the same value on every path reaching the instruction, or the
+        entry is None if the instruction is unreachable. Values are
+        propagated through ``set``, ``mov`` and ``jmp`` decrements and
+        conditions."""
+        values: List["tuple | None"] = [None] * len(self.assembled)
+        pending = []
+        for entry in self.cfg().entries:
+            values[entry] = (None, None)
+            pending.append(entry)
+        while pending:
+            address = pending.pop()
+            for nxt, x, y in self._register_step(address, values[address]):
+                old = values[nxt]
+                new = (
+                    (x, y)
+                    if old is None
+                    else tuple(a if a == b else None for a, b in zip(old, (x, y)))
+                )
+                if new != old:
+                    values[nxt] = new
+                    pending.append(nxt)
+        return values
+
+    def loop_bounds(self) -> dict[int, int]:
+        """Return the trip count of each counted loop whose counter is a known constant
+
+        The result maps each loop header to the number of times the loop's
+        ``jmp x--`` or ``jmp y--`` executes."""
+        values = self.register_values()
+        cfg = self.cfg()
+        bounds = {}
+        for header, (register, _, _, _) in self._counted_loops().items():
+            body = cfg.loop_addresses(header)
+            entering = set()
+            for address, known in enumerate(values):
+                if known is None or address in body:
+                    continue
+                for nxt, x, y in self._register_step(address, known):
+                    if nxt == header:
+                        entering.add(x if register == "x" else y)
+            if len(entering) == 1 and None not in entering:
+                bounds[header] = entering.pop() + 1
+        return bounds
+
+    def _fifo_step(self, address: int, count: int, fifo: str) -> tuple:
+        """Execute one instruction against a FIFO's shift counter
+
+        Return whether a word is transferred, the new shift count, and the
+        possible next addresses."""
+        word = self.assembled[address]
+        opcode = word >> 13
+        destination = (word >> 5) & 7
+        bits = word & 0x1F or 32
+        successors = self._next_addresses(address)[0]
+        accesses = False
+        if fifo == "tx":
+            threshold = self.pio_kwargs.get("pull_threshold", 32)
+            if opcode == 4 and word & 0x90 == 0x80:  # pull
+                if not word & 0x40 or count >= threshold:
+                    accesses, count = True, 0
+            elif opcode == 3:  # out
+                if self.pio_kwargs.get("auto_pull") and count >= threshold:
+                    accesses, count = True, 0
+                count = min(32, count + bits)
+            elif opcode == 5 and destination == 7:  # mov osr
+                count = 0
+            elif opcode == 0 and destination == 7 and len(successors) > 1:  # jmp !osre
+                successors = successors[:1] if count < threshold else successors[1:]
+        else:
+            threshold = self.pio_kwargs.get("push_threshold", 32)
+            if opcode == 4 and word & 0x90 == 0:  # push
+                if not word & 0x40 or count >= threshold:
+                    accesses, count = True, 0
+            elif opcode == 2:  # in
+                count = min(32, count + bits)
+                if self.pio_kwargs.get("auto_push") and count >= threshold:
+                    accesses, count = True, 0
+            elif opcode == 5 and destination == 6:  # mov isr
+                count = 0
+        return accesses, count, successors
+
+    def _fifo_intervals(self, fifo: str) -> dict:
+        """Return the shortest cycles from each access to a FIFO until the next, by address"""
+        pending = [(entry, 32 if fifo == "tx" else 0, None, None) for entry in self.cfg().entries]
+        states = {}
+        while pending:
+            state = pending.pop()
+            if state in states:
+                continue
+            address, count, x, y = state
+            accesses, count, successors = self._fifo_step(address, count, fifo)
+            cycles = 1 + self._delay_and_side_set(address)[0]
+            # Follow small constant loop counters exactly; forget large ones
+            following = [
+                (
+                    nxt,
+                    count,
+                    x if x is None or x < 256 else None,
+                    y if y is None or y < 256 else None,
+                )
+                for nxt, x, y in self._register_step(address, (x, y))
+                if nxt in successors
+            ]
+            states[state] = (accesses, cycles, following)
+            pending.extend(following)
+
+        # Search backwards from the accesses for the shortest cycles from
+        # each state until an access
+        predecessors = {state: [] for state in states}
+        for state, (accesses, cycles, following) in states.items():
+            if not accesses:
+                for nxt in following:
+                    predecessors[nxt].append(state)
+        unbounded = 1 << 32
+        distance = {state: 0 if info[0] else unbounded for state, info in states.items()}
+        order = list(states)
+        index = {state: i for i, state in enumerate(order)}
+        queue = [(0, i) for i, state in enumerate(order) if states[state][0]]
+        while queue:
+            current, i = heapq.heappop(queue)
+            state = order[i]
+            if current > distance[state]:
+                continue
+            for previous in predecessors[state]:
+                candidate = current + states[previous][1]
+                if candidate < distance[previous]:
+                    distance[previous] = candidate
+                    heapq.heappush(queue, (candidate, index[previous]))
+
+        intervals = {}
+        for state, (accesses, cycles, following) in states.items():
+            if accesses:
+                best = min((cycles + distance[nxt] for nxt in following), default=unbounded)
+                intervals[state[0]] = min(best, intervals.get(state[0], unbounded))
+        return {address: None if i >= unbounded else i for address, i in intervals.items()}
+
+    def stall_points(self) -> List["StallPoint"]:
+        """Return each instruction that transfers FIFO data or may stall
+
+        For FIFO accesses, the shortest number of cycles until the next
+        access to the same FIFO is found by following the OSR and ISR shift
+        counts, so ``pull ifempty``, ``push iffull``, ``jmp !osre`` and the
+        autopull and autopush thresholds from the ``.out`` and ``.in``
+        directives are honored. Loop counters loaded with small constants are
+        followed exactly; other branches on data are assumed to be able to go
+        either way."""
+        intervals = {"tx": self._fifo_intervals("tx"), "rx": self._fifo_intervals("rx")}
+        points = []
+        for address, word in enumerate(self.assembled):
+            opcode = word >> 13
+            if address in intervals["tx"]:
+                kind = "tx"
+            elif address in intervals["rx"]:
+                kind = "rx"
+            elif opcode == 1:
+                kind = "wait"
+            elif opcode == 6 and word & 0x20:
+                kind = "irq"
+            else:
+                continue
+            points.append(
+                StallPoint(
+                    address, kind, self._may_stall(address), intervals.get(kind, {}).get(address)
+                )
+            )
+        return points
+
+    def fifo_rates(self, frequency: int) -> dict[str, float]:
+        """Return the FIFO rates, in words per second, needed to keep the program from stalling
+
+        The ``"tx"`` entry is the rate at which the TX FIFO must be fed to
+        avoid underruns and the ``"rx"`` entry the rate at which the RX FIFO
+        must be drained to avoid overruns, when the state machine runs at
+        ``frequency``. A FIFO the program does not use has no entry."""
+        rates = {}
+        for point in self.stall_points():
+            if point.kind in {"tx", "rx"}:
+                rate = 0 if point.min_cycles is None else frequency / point.min_cycles
+                rates[point.kind] = max(rates.get(point.kind, 0), rate)
+        return rates
+
+    def resources(self) -> dict[str, Any]:
+        """Return the PIO resources the program uses
+
+        The result has these keys:
+
+         * ``instructions``: the number of instruction slots needed
+         * ``offset``: the required load address, or None if it may be loaded anywhere
+         * ``pio_version``: the PIO version required
+         * ``irq``: the IRQ flags used by ``irq`` and ``wait irq``
+         * ``irq_set``: the subset of ``irq`` set by ``irq`` (rather than cleared or waited on)
+         * ``irq_rel``: the IRQ flags used with ``rel``, which depend on the state machine
+         * ``irq_neighbor``: the IRQ flags of neighboring PIO blocks used with ``prev`` or ``next``
+         * ``pins``: the count of pins in each pin group (``out``, ``set``, ``sideset``,
+           ``in``) the program's instructions use
+         * ``jmp_pin``: whether ``jmp pin`` or ``wait jmppin`` is used
+         * ``tx_fifo``, ``rx_fifo``: whether each FIFO is used
+         * ``fifo_type``: the FIFO mode"""
+        irq, irq_rel, irq_neighbor, irq_set = set(), set(), set(), set()
+        pins = {}
+        jmp_pin = tx_fifo = rx_fifo = False
+        if self.pio_kwargs.get("sideset_pin_count"):
+            pins["sideset"] = self.pio_kwargs["sideset_pin_count"]
+        for word in self.assembled:
+            opcode = word >> 13
+            field = (word >> 5) & 7
+            if opcode == 6 or (opcode == 1 and field & 3 == 2):  # irq, wait irq
+                mode = (word >> 3) & 3
+                {0: irq, 2: irq_rel}.get(mode, irq_neighbor).add(word & 7)
+                if opcode == 6 and mode == 0 and not word & 0x40:  # not irq clear
+                    irq_set.add(word & 7)
+            elif (opcode == 0 and field == 6) or (opcode == 1 and field & 3 == 3):
+                jmp_pin = True
+            elif (opcode == 1 and field & 3 == 1) or (opcode == 2 and field == 0):
+                pins["in"] = self.pio_kwargs.get("in_pin_count", 1)
+            elif (opcode == 3 and field in {0, 4}) or (opcode == 5 and field in {0, 3}):
+                pins["out"] = self.pio_kwargs.get("out_pin_count", 1)
+            elif opcode == 5 and word & 7 == 0:
+                pins["in"] = self.pio_kwargs.get("in_pin_count", 1)
+            elif opcode == 7 and field in {0, 4}:
+                pins["set"] = self.pio_kwargs.get("set_pin_count", 1)
+            if opcode == 4 and not word & 0x10:
+                tx_fifo |= bool(word & 0x80)
+                rx_fifo |= not word & 0x80
+            tx_fifo |= opcode == 3 and bool(self.pio_kwargs.get("auto_pull"))
+            rx_fifo |= opcode == 2 and bool(self.pio_kwargs.get("auto_push"))
+        return {
+            "instructions": len(self.assembled),
+            "offset": self.pio_kwargs.get("offset"),
+            "pio_version": self.pio_kwargs.get("pio_version", 0),
+            "irq": sorted(irq),
+            "irq_set": sorted(irq_set),
+            "irq_rel": sorted(irq_rel),
+            "irq_neighbor": sorted(irq_neighbor),
+            "pins": pins,
+            "jmp_pin": jmp_pin,
+            "tx_fifo": tx_fifo,
+            "rx_fifo": rx_fifo,
+            "fifo_type": self.pio_kwargs.get("fifo_type", "auto"),
+        }
+
+    def print_cycle_paths(self, frequency: "int | None" = None) -> None:
+        """Print a table of `cycle_paths` and `side_set_paths`
+
+        If ``frequency`` is given, the duration of each path in nanoseconds
+        is included."""
+        for title, paths in (
+            ("labels", self.cycle_paths()),
+            ("side-set", self.side_set_paths()),
+        ):
+            if not paths:
+                continue
+            print(f"{title:<10} {'from':<16} {'to':<16} {'cycles':>6}", end="")
+            print(f" {'ns':>10}" if frequency else "", "  notes", sep="")
+            for path in paths:
+                side = "" if path.side_set is None else f"side {path.side_set}"
+                print(
+                    f"{side:<10} {self._name(path.start):<16} {self._name(path.end):<16}"
+                    f" {path.cycles:>6}",
+                    end="",
+                )
+                if frequency:
+                    print(f" {path.nanoseconds(frequency):>10.1f}", end="")
+                notes = []
+                if path.data_dependent:
+                    notes.append("data")
+                if path.stalls:
+                    notes.append("stalls at " + ", ".join(str(a) for a in path.stalls))
+                print("  " + "; ".join(notes))
+            print()
+
+
+def _successors(word: int, address: int, wrap: int, wrap_target: int, length: int) -> tuple:
+    """Return the possible next addresses of an instruction, and whether it is a computed jump"""
+    following = wrap_target if address == wrap else address + 1
+    fallthrough = [following] if following < length else []
+    opcode = word >> 13
+    destination = (word >> 5) & 7
+    if opcode == 0:  # jmp
+        target = word & 0x1F
+        if (word >> 5) & 7 == 0 or target in fallthrough:
+            return [target], False
+        return [target] + fallthrough, False
+    if (opcode == 3 and destination == 5) or (opcode == 5 and destination == 5):
+        return [], True  # out pc, mov pc
+    if (opcode == 3 and destination == 7) or (opcode == 5 and destination == 4):
+        return fallthrough, True  # out exec, mov exec
+    return fallthrough, False
+
+
+def _writes_pins(word: int) -> bool:
+    """Return True for ``set pins``, ``out pins`` and ``mov pins``"""
+    return word >> 13 in {3, 5, 7} and (word >> 5) & 7 == 0
+
+
+def _self_move(word: int) -> bool:
+    """Return True for ``mov x, x`` and ``mov y, y`` (``nop``), which change nothing"""
+    field = (word >> 5) & 7
+    return word >> 13 == 5 and field in {1, 2} and word & 0x1F == field
+
+
+def _reads(word: int) -> set:
+    """Return the scratch registers an instruction may read"""
+    opcode = word >> 13
+    field = (word >> 5) & 7
+    if _self_move(word):
+        return set()
+    if (opcode == 3 and field == 7) or (opcode == 5 and field == 4):
+        return {"x", "y"}  # out exec, mov exec
+    if opcode == 0:
+        return {1: {"x"}, 2: {"x"}, 3: {"y"}, 4: {"y"}, 5: {"x", "y"}}.get(field, set())
+    if opcode in {2, 5}:
+        return {1: {"x"}, 2: {"y"}}.get(word & 7 if opcode == 5 else field, set())
+    if opcode == 4 and word & 0xB0 == 0x80:  # pull noblock copies X when the FIFO is empty
+        return {"x"}
+    return set()
+
+
+def _writes(word: int) -> set:
+    """Return the scratch registers an instruction may change"""
+    opcode = word >> 13
+    destination = (word >> 5) & 7
+    if _self_move(word):
+        return set()
+    if (opcode == 3 and destination == 7) or (opcode == 5 and destination == 4):
+        return {"x", "y"}  # out exec, mov exec
+    if opcode == 0:
+        return {2: {"x"}, 4: {"y"}}.get(destination, set())
+    if opcode in {3, 5, 7}:
+        return {1: {"x"}, 2: {"y"}}.get(destination, set())
+    return set()
+
+
+class TimingPath:
+    """The instructions executed along one path through a `Program`, and their cycle count
+
+    Use `Program.cycle_paths` or `Program.side_set_paths` to obtain these."""
+
+    addresses: List[int]
+    """The addresses of the instructions executed, in order"""
+    end: "int | None"
+    """The address where the path stops, or None at a computed jump or the end of the program"""
+    cycles: int
+    """The cycles taken by the path, including delays, if no instruction stalls"""
+    data_dependent: bool
+    """True if the path depends on the outcome of a conditional ``jmp``"""
+    stalls: List[int]
+    """The addresses of instructions on the path that may stall, adding cycles"""
+    side_set: "int | None"
+    """For `Program.side_set_paths`, the side-set value held along the path"""
+
+    def __init__(
+        self, program: Program, addresses: List[int], end: "int | None", side_set: "int | None"
+    ) -> None:
+        self.addresses = addresses
+        self.end = end
+        self.side_set = side_set
+        self.cycles = sum(1 + program._delay_and_side_set(a)[0] for a in addresses)
+        self.data_dependent = any(
+            len(program._next_addresses(a)[0]) > 1 or program._next_addresses(a)[1]
+            for a in addresses
+        )
+        self.stalls = [a for a in addresses if program._may_stall(a)]
+
+    @property
+    def start(self) -> int:
+        """The address of the first instruction on the path"""
+        return self.addresses[0]
+
+    def nanoseconds(self, frequency: int) -> float:
+        """Return the duration of the path when the state machine runs at ``frequency``"""
+        return self.cycles * 1e9 / frequency
+
+    def __repr__(self) -> str:
+        return f"<TimingPath {self.addresses} -> {self.end}: {self.cycles} cycles>"
+
+
+class ClockSolution:
+    """The clock divider that best achieves a loop rate, from `Program.solve_frequency`
+
+    Example::
+
+        solution = program.solve_frequency(800_000)
+        state_machine = rp2pio.StateMachine(
+            program.assembled, frequency=solution.frequency, ..., **program.pio_kwargs
+        )
+
+    """
+
+    cycles: int
+    """The state machine cycles per loop iteration (the longest, if paths differ)"""
+    divider_int: int
+    """The integer part of the clock divider"""
+    divider_frac: int
+    """The fractional part of the clock divider, in 256ths"""
+    frequency: int
+    """The value to pass as ``frequency`` to obtain this divider"""
+    rate: float
+    """The achieved loop rate"""
+    error: float
+    """The relative error of the achieved rate, ``(achieved - target) / target``"""
+    jitter_ns: float
+    """The peak-to-peak variation in the duration of one loop iteration, from
+    a fractional divider or from paths with different cycle counts"""
+
+    def __init__(self, rate: float, system_clock: int, all_cycles: List[int]) -> None:
+        self.cycles = max(all_cycles)
+        div256 = round(system_clock * 256 / (rate * self.cycles))
+        div256 = min(max(div256, 256), 65536 * 256)
+        self.divider_int, self.divider_frac = divmod(div256, 256)
+        self.frequency = system_clock * 256 // div256
+        self.rate = system_clock * 256 / div256 / self.cycles
+        self.error = (self.rate - rate) / rate
+        spread = (self.cycles - min(all_cycles)) * div256 * 1e9 / 256 / system_clock
+        dither = 1e9 / system_clock if (self.cycles * self.divider_frac) % 256 else 0
+        self.jitter_ns = spread + dither
+
+    @property
+    def divider(self) -> float:
+        """The clock divider, including its fractional part"""
+        return self.divider_int + self.divider_frac / 256
+
+    def __repr__(self) -> str:
+        return (
+            f"<ClockSolution divider={self.divider} frequency={self.frequency}"
+            f" rate={self.rate:.1f} error={self.error:+.2e}>"
+        )
+
+
+class StallPoint:
+    """An instruction that transfers FIFO data or may stall, from `Program.stall_points`"""
+
+    address: int
+    """The address of the instruction"""
+    kind: str
+    """``"tx"`` or ``"rx"`` for FIFO transfers, ``"wait"`` for ``wait``,
+    or ``"irq"`` for ``irq wait``"""
+    blocking: bool
+    """True if the instruction may stall the state machine"""
+    min_cycles: "int | None"
+    """For FIFO transfers, the fewest cycles from this transfer to the next one
+    on the same FIFO, or None if there may not be another"""
+
+    def __init__(self, address: int, kind: str, blocking: bool, min_cycles: "int | None") -> None:
+        self.address = address
+        self.kind = kind
+        self.blocking = blocking
+        self.min_cycles = min_cycles
+
+    def __repr__(self) -> str:
+        return f"<StallPoint {self.kind} at {self.address}: {self.min_cycles} cycles>"
+
+
+class CycleFormula:
+    """The cycles along a path as an affine function of loop counter values
+
+    Use `Program.cycle_formulas` to obtain these. For example, a formula
+    printed as ``32*x + 35`` takes 35 cycles plus 32 for each count in X
+    when the loop is entered."""
+
+    addresses: List[int]
+    """The addresses of the instructions on the path; each counted loop appears once"""
+    end: "int | None"
+    """The address where the path stops, or None at a computed jump or the end of the program"""
+    constant: int
+    """The cycles taken when every loop counter is zero"""
+    terms: List[tuple]
+    """``(register, cycles_per_count, source)`` for each counted loop on the path, where
+    ``source`` is the address of the instruction that loaded the register, or None"""
+    data_dependent: bool
+    """True if the path goes through a loop that is not counted; the formula then
+    gives the cycles for a single pass around that loop"""
+
+    def __init__(
+        self,
+        addresses: List[int],
+        end: "int | None",
+        constant: int,
+        terms: List[tuple],
+        data_dependent: bool = False,
+    ) -> None:
+        self.addresses = addresses
+        self.end = end
+        self.constant = constant
+        self.terms = terms
+        self.data_dependent = data_dependent
+
+    def cycles(self, *values: int) -> int:
+        """Return the cycles taken when the loop counters have the given values"""
+        if len(values) != len(self.terms):
+            raise ValueError(f"Expected {len(self.terms)} values")
+        return self.constant + sum(term[1] * value for term, value in zip(self.terms, values))
+
+    def solve(self, cycles: int) -> int:
+        """Return the loop counter value that makes the path take exactly ``cycles``"""
+        if len(self.terms) != 1:
+            raise ValueError("Can only solve a formula with one term")
+        value, remainder = divmod(cycles - self.constant, self.terms[0][1])
+        if remainder or value < 0:
+            raise ValueError(f"No counter value gives {cycles} cycles for {self}")
+        return value
+
+    def __str__(self) -> str:
+        return " + ".join(
+            [f"{scale}*{register}" for register, scale, _ in self.terms] + [str(self.constant)]
+        )
+
+    def __repr__(self) -> str:
+        suffix = " (data dependent)" if self.data_dependent else ""
+        return f"<CycleFormula {self.addresses} -> {self.end}: {self}{suffix}>"
+
+
+class BasicBlock:
+    """A straight-line run of instructions with a single entry and exit"""
+
+    start: int
+    """The address of the first instruction in the block"""
+    end: int
+    """The address of the last instruction in the block (inclusive)"""
+    successors: List[int]
+    """The start addresses of the blocks that may execute next"""
+    computed: bool
+    """True if the block ends in ``out pc``, ``mov pc``, ``out exec`` or ``mov exec``,
+    whose destination cannot be known statically"""
+
+    def __init__(self, start: int, end: int, successors: List[int], computed: bool) -> None:
+        self.start = start
+        self.end = end
+        self.successors = successors
+        self.computed = computed
+
+    def __repr__(self) -> str:
+        return f"<BasicBlock {self.start}..{self.end} -> {self.successors}>"
+
+
+class ControlFlowGraph:
+    """The basic blocks of a `Program` and the edges between them
+
+    Edges include conditional and unconditional ``jmp``, fall-through and the
+    implicit edge from ``.wrap`` back to ``.wrap_target``. Use `Program.cfg`
+    rather than constructing this directly."""
+
+    blocks: List[BasicBlock]
+    """The basic blocks in address order"""
+    entries: List[int]
+    """Addresses where execution may begin: the program start and any public labels"""
+    back_edges: List[tuple]
+    """``(tail, header)`` block start pairs for edges that close a loop"""
+    loops: dict[int, List[int]]
+    """For each loop header, the start addresses of the blocks in its loop body"""
+
+    def __init__(self, program: Program) -> None:
+        assembled = program.assembled
+        length = len(assembled)
+        wrap_target = program.pio_kwargs.get("wrap_target", 0)
+
+        self.entries = sorted({0} | set(program.public_labels.values())) if length else []
+
+        leaders = set(self.entries)
+        leaders.add(wrap_target)
+        edges = []
+        for address in range(length):
+            successors, computed = program._next_addresses(address)
+            edges.append((successors, computed))
+            if computed or successors != [address + 1]:
+                leaders.update(successors)
+                leaders.add(address + 1)
+        leaders = sorted(leader for leader in leaders if leader < length)
+
+        self.blocks = []
+        self._block_index = [0] * length
+        for i, start in enumerate(leaders):
+            end = (leaders[i + 1] if i + 1 < len(leaders) else length) - 1
+            successors, computed = edges[end]
+            self.blocks.append(BasicBlock(start, end, successors, computed))
+            for address in range(start, end + 1):
+                self._block_index[address] = i
+
+        self.back_edges = []
+        self._find_back_edges()
+        self.back_edges.sort()
+        self.loops = {}
+        for tail, header in self.back_edges:
+            body = self.loops.setdefault(header, [header])
+            pending = [tail]
+            while pending:
+                node = pending.pop()
+                if node in body:
+                    continue
+                body.append(node)
+                pending.extend(self.predecessors(node))
+        for body in self.loops.values():
+            body.sort()
+
+    def _find_back_edges(self) -> None:
+        state = {}  # 1: on the DFS stack, 2: finished
+        for entry in self.entries:
+            if entry in state:
+                continue
+            state[entry] = 1
+            stack = [(entry, iter(self.block_at(entry).successors))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if state.get(child) == 1:
+                        self.back_edges.append((node, child))
+                    elif child not in state:
+                        state[child] = 1
+                        stack.append((child, iter(self.block_at(child).successors)))
+                        break
+                else:
+                    state[node] = 2
+                    stack.pop()
+
+    def block_at(self, address: int) -> BasicBlock:
+        """Return the block containing the instruction at ``address``"""
+        return self.blocks[self._block_index[address]]
+
+    def loop_addresses(self, header: int) -> set:
+        """Return the addresses of the instructions in the loop with the given header"""
+        addresses = set()
+        for start in self.loops[header]:
+            addresses.update(range(start, self.block_at(start).end + 1))
+        return addresses
+
+    def predecessors(self, start: int) -> List[int]:
+        """Return the start addresses of the blocks that may execute before block ``start``"""
+        return [block.start for block in self.blocks if start in block.successors]
+
+    def reachable(self) -> List[int]:
+        """Return the start addresses of the blocks reachable from the entries"""
+        seen = set()
+        pending = list(self.entries)
+        while pending:
+            start = pending.pop()
+            if start not in seen:
+                seen.add(start)
+                pending.extend(self.block_at(start).successors)
+        return sorted(seen)
+
+
+def check_resources(programs: "dict[str, Program] | Sequence[Program]") -> List[str]:
+    """Check whether programs can share one PIO block
+
+    ``programs`` is a list of programs, or a dict mapping names to
+    programs. Return a description of each problem found: too many
+    programs or instructions, overlapping ``.origin`` placements, and IRQ
+    flags set by more than one program. A flag set by one program and
+    waited on by another is how programs synchronize, so it is not a
+    problem. An empty list means the programs fit."""
+    if isinstance(programs, dict):
+        named = [(name, program.resources()) for name, program in programs.items()]
+    else:
+        named = [(str(i), program.resources()) for i, program in enumerate(programs)]
+
+    problems = []
+    if len(named) > 4:
+        problems.append(f"{len(named)} programs need more than the 4 state machines in a PIO block")
+    total = sum(resources["instructions"] for _, resources in named)
+    if total > 32:
+        problems.append(f"{total} instructions do not fit in the 32 instruction slots")
+    placed = sorted(
+        (resources["offset"], resources["offset"] + resources["instructions"], name)
+        for name, resources in named
+        if resources["offset"] is not None
+    )
+    for start, end, name in placed:
+        if end > 32:
+            problems.append(f"Program {name} at offset {start} extends past slot 31")
+    used = [None] * 32
+    for start, end, name in placed:
+        overlapped = []
+        for address in range(start, min(end, 32)):
+            if used[address] is None:
+                used[address] = name
+            elif used[address] not in overlapped:
+                overlapped.append(used[address])
+                problems.append(f"Programs {used[address]} and {name} overlap at offset {address}")
+    for flag in range(8):
+        users = [name for name, resources in named if flag in resources["irq_set"]]
+        if len(users) > 1:
+            problems.append(f"IRQ flag {flag} is set by programs {', '.join(users)}")
+    return problems
+
+
+class RelocatableProgram:
+    """A program's instructions, with the address fields that depend on its load address
+
+    ``jmp`` instructions hold absolute addresses, which `adafruit_pioasm.Program`
+    assembles for address 0. Create this from any program, or with `Program.relocatable`.
+
+    Example::
+
+        relocatable = program.relocatable()
+        assembled = relocatable.relocate(free_offset)
+
+    """
+
+    assembled: array.array
+    """The instructions, assembled for address 0"""
+    jumps: List[int]
+    """The addresses of the instructions whose low 5 bits hold a jump target"""
+    public_labels: dict[str, int]
+    """The address of each public label"""
+    wrap: dict[str, int]
+    """The ``wrap`` and ``wrap_target`` settings, if set"""
+
+    def __init__(self, program: adafruit_pioasm.Program) -> None:
+        self.assembled = array.array("H", program.assembled)
+        self.jumps = [address for address, word in enumerate(self.assembled) if word >> 13 == 0]
+        self.public_labels = dict(program.public_labels)
+        self.wrap = {
+            key: program.pio_kwargs[key]
+            for key in ("wrap", "wrap_target")
+            if key in program.pio_kwargs
+        }
+
+    def relocate(self, offset: int) -> array.array:
+        """Return the instructions patched to be loaded at ``offset``
+
+        Raise ValueError if the program does not fit at ``offset``."""
+        if not 0 <= offset <= 32 - len(self.assembled):
+            raise ValueError(
+                f"Program of {len(self.assembled)} instructions cannot load at {offset}"
+            )
+        result = array.array("H", self.assembled)
+        for address in self.jumps:
+            result[address] += offset
+        return result
+
+    def public_labels_at(self, offset: int) -> dict[str, int]:
+        """Return `public_labels` for the program loaded at ``offset``"""
+        return {label: address + offset for label, address in self.public_labels.items()}
+
+    def wrap_at(self, offset: int) -> dict[str, int]:
+        """Return `wrap` for the program loaded at ``offset``, as absolute addresses"""
+        return {key: address + offset for key, address in self.wrap.items()}
+
+    def __repr__(self) -> str:
+        return f"<RelocatableProgram {len(self.assembled)} instructions, {len(self.jumps)} jumps>"
+
+
+class LinkedImage:
+    """Several programs placed together in one PIO block's instruction memory
+
+    Use `link` to create this. Its attributes are dicts keyed the same way
+    as the programs passed to `link`: by name, or by position in a list.
+
+    Example::
+
+        image = adafruit_pioasm_host.link({"tx": uart_tx, "rx": uart_rx})
+        tx = rp2pio.StateMachine(uart_tx.assembled, ..., **image.pio_kwargs["tx"])
+
+    """
+
+    assembled: array.array
+    """The instruction memory contents up to the last slot used, with absolute
+    ``jmp`` targets. Unused slots are zero."""
+    offsets: dict
+    """The load address of each program"""
+    public_labels: dict
+    """The absolute address of each program's public labels"""
+    pio_kwargs: dict
+    """Each program's `pio_kwargs <adafruit_pioasm.Program.pio_kwargs>`, with ``offset``
+    set to its load address"""
+
+    def __init__(
+        self, programs: "dict[Any, adafruit_pioasm.Program]", offsets: "dict[Any, int]"
+    ) -> None:
+        self.offsets = offsets
+        size = max(
+            (offsets[key] + len(program.assembled) for key, program in programs.items()), default=0
+        )
+        self.assembled = array.array("H", [0] * size)
+        self.public_labels = {}
+        self.pio_kwargs = {}
+        for key, program in programs.items():
+            offset = offsets[key]
+            relocatable = RelocatableProgram(program)
+            words = relocatable.relocate(offset)
+            self.assembled[offset : offset + len(words)] = words
+            self.public_labels[key] = relocatable.public_labels_at(offset)
+            self.pio_kwargs[key] = dict(program.pio_kwargs, offset=offset)
+
+    def __repr__(self) -> str:
+        return f"<LinkedImage {len(self.assembled)} instructions at {self.offsets}>"
+
+
+def link(
+    programs: "dict[Any, adafruit_pioasm.Program] | Sequence[adafruit_pioasm.Program]",
+) -> LinkedImage:
+    """Place programs together in the 32 instruction slots of one PIO block
+
+    ``programs`` is a list of programs, or a dict mapping names to programs.
+    Programs with an ``.origin`` are placed there; the others are placed at
+    the lowest free address, largest first. Raise ValueError if a program
+    with an ``.origin`` overlaps another, or if the programs do not fit.
+
+    Programs that compute jump targets at run time (``mov pc`` or ``out pc``)
+    are not adjusted for their load address."""
+    if not isinstance(programs, dict):
+        programs = dict(enumerate(programs))
+    used = [None] * 32
+    offsets = {}
+
+    def place(key, offset, length):
+        for address in range(offset, offset + length):
+            used[address] = key
+        offsets[key] = offset
+
+    fixed = [(key, program) for key, program in programs.items() if "offset" in program.pio_kwargs]
+    for key, program in fixed:
+        offset = program.pio_kwargs["offset"]
+        length = len(program.assembled)
+        if offset + length > 32:
+            raise ValueError(f"Program {key} at offset {offset} extends past slot 31")
+        for address in range(offset, offset + length):
+            if used[address] is not None:
+                raise ValueError(f"Programs {used[address]} and {key} overlap at offset {address}")
+        place(key, offset, length)
+
+    movable = [
+        (key, program) for key, program in programs.items() if "offset" not in program.pio_kwargs
+    ]
+    movable.sort(key=lambda item: -len(item[1].assembled))
+    for key, program in movable:
+        length = len(program.assembled)
+        for offset in range(33 - length):
+            if all(slot is None for slot in used[offset : offset + length]):
+                place(key, offset, length)
+                break
+        else:
+            raise ValueError(f"No room for the {length} instructions of program {key}")
+
+    return LinkedImage(programs, offsets)
+
+
+def main() -> None:
+    """Assemble a PIO program file and print it as a C array, optionally optimized
+
+    Usage: ``python -m adafruit_pioasm_host [-O LEVEL] program.pio``"""
+    parser = argparse.ArgumentParser(
+        prog="python -m adafruit_pioasm_host",
+        description="Assemble a PIO program and print it as C",
+    )
+    parser.add_argument("filename")
+    parser.add_argument(
+        "-O",
+        "--optimize",
+        type=int,
+        default=0,
+        choices=[0, *OPTIMIZATION_PASSES],
+        help="optimization level",
+    )
+    args = parser.parse_args()
+    try:
+        program = Program.from_file(args.filename, build_debuginfo=True, optimize=args.optimize)
+    except (OSError, RuntimeError, SyntaxError, ValueError) as exc:
+        parser.exit(1, f"{args.filename}: {exc}\n")
+    if program.optimization_report:
+        print(program.optimization_report, file=sys.stderr)
+    program.print_c_program(os.path.splitext(os.path.basename(args.filename))[0])
+
+
+if __name__ == "__main__":
+    main()
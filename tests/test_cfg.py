@@ -0,0 +1,87 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests control-flow graph construction
+"""
+
+import adafruit_pioasm_host
+
+NEOPIXEL = """
+.side_set 1 opt
+.wrap_target
+    pull block          side 0
+    out y, 32           side 0      ; get count of NeoPixel bits
+
+bitloop:
+    pull ifempty        side 0      ; drive low
+    out x 1             side 0 [5]
+    jmp !x do_zero      side 1 [3]  ; drive high and branch depending on bit val
+    jmp y--, bitloop    side 1 [4]  ; drive high for a one (long pulse)
+    jmp end_sequence    side 0      ; sequence is over
+
+do_zero:
+    jmp y--, bitloop    side 0 [4]  ; drive low for a zero (short pulse)
+
+end_sequence:
+    pull block          side 0      ; get fresh delay value
+    out y, 32           side 0      ; get delay count
+wait_reset:
+    jmp y--, wait_reset side 0      ; wait until delay elapses
+.wrap
+"""
+
+
+def test_blocks() -> None:
+    cfg = adafruit_pioasm_host.Program(NEOPIXEL).cfg()
+    assert [(b.start, b.end, b.successors) for b in cfg.blocks] == [
+        (0, 1, [2]),
+        (2, 4, [7, 5]),
+        (5, 5, [2, 6]),
+        (6, 6, [8]),
+        (7, 7, [2, 8]),
+        (8, 9, [10]),
+        (10, 10, [10, 0]),
+    ]
+    assert cfg.back_edges == [(5, 2), (7, 2), (10, 0), (10, 10)]
+    assert cfg.loops[2] == [2, 5, 7]
+    assert cfg.loops[10] == [10]
+    assert cfg.loops[0] == [0, 2, 5, 6, 7, 8, 10]
+    assert cfg.loop_addresses(2) == {2, 3, 4, 5, 7}
+    assert cfg.loop_addresses(10) == {10}
+
+
+def test_cached() -> None:
+    program = adafruit_pioasm_host.Program(NEOPIXEL)
+    assert program.cfg() is program.cfg()
+
+
+def test_wrap_and_public_labels() -> None:
+    program = adafruit_pioasm_host.Program(
+        """
+        nop
+    .wrap_target
+        nop
+    .wrap
+    public other:
+        set x, 1
+        """
+    )
+    cfg = program.cfg()
+    assert cfg.entries == [0, 2]
+    assert [(b.start, b.end, b.successors) for b in cfg.blocks] == [
+        (0, 0, [1]),
+        (1, 1, [1]),
+        (2, 2, []),
+    ]
+    assert cfg.reachable() == [0, 1, 2]
+
+
+def test_computed_jump() -> None:
+    cfg = adafruit_pioasm_host.Program("out pc, 5\nnop\nmov exec, x\nnop").cfg()
+    assert [(b.start, b.successors, b.computed) for b in cfg.blocks] == [
+        (0, [], True),
+        (1, [3], True),
+        (3, [0], False),
+    ]
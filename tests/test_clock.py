@@ -0,0 +1,54 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests the clock divider solver
+"""
+
+import pytest
+from test_cfg import NEOPIXEL
+
+import adafruit_pioasm_host
+
+UART_TX = """
+.program uart_tx
+.side_set 1 opt
+  pull side 1 [7]
+  set x, 7 side 0 [7]
+bitloop:
+  out pins, 1
+  jmp x-- bitloop [6]
+"""
+
+
+def test_loop_cycles() -> None:
+    assert adafruit_pioasm_host.Program(NEOPIXEL).loop_cycles() == [16, 16]
+    assert adafruit_pioasm_host.Program(NEOPIXEL).loop_cycles("wait_reset") == [1]
+    assert adafruit_pioasm_host.Program(UART_TX).loop_cycles() == [8]
+    with pytest.raises(ValueError):
+        adafruit_pioasm_host.Program("nop").loop_cycles()
+    with pytest.raises(ValueError):
+        adafruit_pioasm_host.Program(UART_TX).loop_cycles("nowhere")
+
+
+def test_neopixel_frequency() -> None:
+    solution = adafruit_pioasm_host.Program(NEOPIXEL).solve_frequency(800_000)
+    # pioasm_neopixel_bg.py uses frequency=12_800_000
+    assert solution.frequency == 12_800_000
+    assert solution.divider == 9.765625
+    assert solution.error == 0
+    assert solution.jitter_ns == 8
+
+
+def test_exact_divider() -> None:
+    solution = adafruit_pioasm_host.Program(UART_TX).solve_frequency(1_000_000, 120_000_000)
+    assert (solution.divider_int, solution.divider_frac) == (15, 0)
+    assert solution.frequency == 8_000_000
+    assert solution.jitter_ns == 0
+
+
+def test_clamped() -> None:
+    solution = adafruit_pioasm_host.Program("nop").solve_frequency(1, cycles=2)
+    assert solution.divider == 65536
+    assert solution.error > 0
@@ -0,0 +1,69 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests the .cycles directive
+"""
+
+import pytest
+from pytest_helpers import assert_assembly_fails
+from test_cfg import NEOPIXEL
+
+import adafruit_pioasm
+import adafruit_pioasm_host
+
+
+def assert_check_fails(source: str, match: str) -> None:
+    with pytest.raises(RuntimeError, match=match):
+        adafruit_pioasm_host.Program(source)
+
+
+def test_cycles_pass() -> None:
+    adafruit_pioasm_host.Program(NEOPIXEL + ".cycles bitloop do_zero == 11\n")
+    adafruit_pioasm_host.Program(
+        """
+    .cycles start end <= 5
+    start:
+        set x, 1 [1]
+        jmp !x end
+        nop [1]
+    end:
+        nop
+        """
+    )
+
+
+def test_cycles_fail() -> None:
+    assert_check_fails(
+        NEOPIXEL + ".cycles bitloop do_zero < 11\n",
+        match=r"Path \[2, 3, 4\] takes 11 cycles, violating .cycles bitloop do_zero < 11",
+    )
+    assert_check_fails(
+        "start:\nset x, 1 [1]\njmp !x end\nnop [1]\nend:\nnop\n.cycles start end == 5",
+        match="takes 3 cycles",
+    )
+
+
+def test_cycles_unchecked() -> None:
+    # The checks need the timing analysis, so only the host Program makes them
+    adafruit_pioasm.Program(NEOPIXEL + ".cycles bitloop do_zero < 11\n")
+
+
+def test_cycles_loop() -> None:
+    # The loop takes a number of cycles that the paths do not account for
+    assert_check_fails(
+        "a:\nset x, 3\nl:\njmp x-- l\nb:\nnop\n.cycles a b <= 2",
+        match="A path from a to b goes around a loop",
+    )
+    # Returning to the start label begins a new path
+    adafruit_pioasm_host.Program("a:\njmp pin a\nb:\nnop\n.cycles a b == 1")
+
+
+def test_cycles_invalid() -> None:
+    assert_assembly_fails(".cycles a b", match="Invalid .cycles")
+    assert_assembly_fails("a:\nnop\n.cycles a b ~ 3", match="Invalid .cycles")
+    assert_assembly_fails(
+        "a:\nnop\n.cycles a b == 3", match="Invalid .cycles label 'b'", errtype=SyntaxError
+    )
+    assert_check_fails("a:\nnop\n.wrap\nb:\nnop\n.cycles a b == 3", match="No path")
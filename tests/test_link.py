@@ -0,0 +1,91 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests placing several programs in one PIO block
+"""
+
+import pytest
+from test_clock import UART_TX
+
+import adafruit_pioasm
+import adafruit_pioasm_host
+
+COUNTER = """
+public start:
+    set x, 3
+loop:
+    jmp x-- loop
+.wrap_target
+    nop
+.wrap
+"""
+
+
+def test_link() -> None:
+    uart = adafruit_pioasm_host.Program(UART_TX)
+    counter = adafruit_pioasm_host.Program(COUNTER)
+    image = adafruit_pioasm_host.link({"uart": uart, "counter": counter})
+    assert image.offsets == {"uart": 0, "counter": 4}
+    assert list(image.assembled[:4]) == list(uart.assembled)
+    assert list(image.assembled[4:]) == [0xE023, 0x0045, 0xA042]
+    assert image.public_labels == {"uart": {}, "counter": {"start": 4}}
+    assert image.pio_kwargs["counter"] == dict(counter.pio_kwargs, offset=4)
+    assert image.pio_kwargs["counter"]["wrap_target"] == 2
+
+
+def test_link_origin() -> None:
+    uart = adafruit_pioasm_host.Program(UART_TX)
+    counter = adafruit_pioasm_host.Program(".origin 2\n" + COUNTER)
+    image = adafruit_pioasm_host.link([uart, counter])
+    assert image.offsets == {1: 2, 0: 5}
+    assert list(image.assembled[:2]) == [0, 0]
+    assert image.assembled[3] == 0x0043
+    assert image.assembled[8] == 0x0647
+
+    with pytest.raises(ValueError, match="overlap at offset 3"):
+        adafruit_pioasm_host.link([counter, adafruit_pioasm_host.Program(".origin 3\nnop")])
+    with pytest.raises(ValueError, match="extends past slot 31"):
+        adafruit_pioasm_host.link([adafruit_pioasm_host.Program(".origin 30\n" + COUNTER)])
+
+
+def test_link_full() -> None:
+    programs = [adafruit_pioasm_host.Program(UART_TX)] * 8
+    assert len(adafruit_pioasm_host.link(programs).assembled) == 32
+    with pytest.raises(ValueError, match="No room"):
+        adafruit_pioasm_host.link(programs + [adafruit_pioasm_host.Program("nop")])
+
+
+def test_relocatable() -> None:
+    program = adafruit_pioasm_host.Program(COUNTER)
+    relocatable = program.relocatable()
+    assert relocatable.jumps == [1]
+    assert relocatable.public_labels == {"start": 0}
+    assert relocatable.wrap == {"wrap": 2, "wrap_target": 2}
+    assert list(relocatable.relocate(0)) == list(program.assembled)
+    assert list(relocatable.relocate(29)) == [0xE023, 0x005E, 0xA042]
+    assert relocatable.public_labels_at(29) == {"start": 29}
+    assert relocatable.wrap_at(29) == {"wrap": 31, "wrap_target": 31}
+    assert list(program.assembled) == [0xE023, 0x0041, 0xA042]
+    with pytest.raises(ValueError):
+        relocatable.relocate(30)
+    with pytest.raises(ValueError):
+        relocatable.relocate(-1)
+
+
+def test_relocatable_label_names() -> None:
+    program = adafruit_pioasm_host.Program(
+        "nop\n.wrap_target\nnop\npublic wrap_target:\nnop\npublic wrap:\nnop"
+    )
+    relocatable = program.relocatable()
+    assert relocatable.public_labels_at(4) == {"wrap_target": 6, "wrap": 7}
+    assert relocatable.wrap_at(4) == {"wrap_target": 5}
+    image = adafruit_pioasm_host.link({"main": program})
+    assert image.public_labels == {"main": {"wrap_target": 2, "wrap": 3}}
+
+
+def test_link_device_programs() -> None:
+    # Programs assembled with adafruit_pioasm, as drivers do, can be linked too
+    image = adafruit_pioasm_host.link([adafruit_pioasm.Program(COUNTER)] * 2)
+    assert list(image.assembled) == [0xE023, 0x0041, 0xA042, 0xE023, 0x0044, 0xA042]
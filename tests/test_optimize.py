@@ -0,0 +1,383 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests optimization passes
+"""
+
+import pytest
+
+import adafruit_pioasm_host
+
+
+def timing(program):
+    return sorted((path.cycles, path.end is None) for path in program.cycle_paths(0, 0))
+
+
+def test_fold_nops() -> None:
+    source = """
+    .side_set 1 opt
+    start:
+        set pins, 1 side 1
+        nop
+        nop [2]
+        nop side 1
+        nop side 0
+    .wrap_target
+        jmp x-- start
+        nop [3]
+    .wrap
+    """
+    program = adafruit_pioasm_host.Program(source)
+    before = timing(program)
+    assert program.fold_nops() == 3
+    assert list(program.assembled) == [0xFD01, 0xB042, 0x0040, 0xA342]
+    assert program.pio_kwargs["wrap_target"] == 2
+    assert program.pio_kwargs["wrap"] == 3
+    assert timing(program) == before
+
+
+def test_fold_nops_blocked() -> None:
+    # Labels, jump targets, delay overflow and computed jumps all prevent folding
+    for source in (
+        "set x, 1\nlabel:\nnop",
+        "set x, 1\nnop\njmp 1",
+        "set x, 1 [31]\nnop",
+        "out pc, 5\nnop",
+        "jmp x-- 0\nnop",
+        ".side_set 1\nset x, 1 side 0\nnop side 1",
+    ):
+        program = adafruit_pioasm_host.Program(source)
+        assert program.fold_nops() == 0, source
+    program = adafruit_pioasm_host.Program(".side_set 1\nset x, 1 side 1 [2]\nnop side 1 [1]")
+    assert program.fold_nops() == 1
+    assert list(program.assembled) == [0xF421]
+
+
+def test_fold_nops_labels() -> None:
+    program = adafruit_pioasm_host.Program(
+        "set x, 1\nnop\npublic entry:\njmp !x entry\nlater:\njmp later", build_debuginfo=True
+    )
+    assert program.fold_nops() == 1
+    assert program.public_labels == {"entry": 1}
+    assert list(program.assembled) == [0xE121, 0x0021, 0x0002]
+    assert program.debuginfo[0] == [0, 3, 5]
+
+
+def test_infer_wrap() -> None:
+    # The pattern from pioasm_txuart.py, written with a trailing jmp
+    program = adafruit_pioasm_host.Program(
+        """
+    .side_set 1 opt
+    top:
+        pull side 1 [7]
+        set x, 7 side 0 [7]
+    bitloop:
+        out pins, 1
+        jmp x-- bitloop [6]
+        jmp top
+        """
+    )
+    assert str(program.cycle_formulas()[0]) == "81"
+    assert program.infer_wrap() == 1
+    assert len(program.assembled) == 4
+    assert (program.pio_kwargs["wrap_target"], program.pio_kwargs["wrap"]) == (0, 3)
+    assert str(program.cycle_formulas()[0]) == "80"
+
+    # A delay on the jmp moves to the instruction before it
+    program = adafruit_pioasm_host.Program(
+        """
+    top:
+        pull
+        set x, 7
+        out pins, 1 [1]
+        nop
+        jmp top [2]
+        """
+    )
+    before = program.cycle_formulas()[0].constant
+    assert program.infer_wrap() == 1
+    assert list(program.assembled) == [0x80A0, 0xE027, 0x6101, 0xA242]
+    assert (program.pio_kwargs["wrap_target"], program.pio_kwargs["wrap"]) == (0, 3)
+    assert program.cycle_formulas()[0].constant == before - 1
+
+
+def test_infer_wrap_blocked() -> None:
+    for source in (
+        "nop\njmp 1",  # not backward
+        "loop:\nnop\njmp x-- loop",  # conditional
+        "loop:\nnop\npublic again:\njmp loop",  # entry point
+        "loop:\nnop\njmp 2\njmp loop",  # other jumps reach it
+        "loop:\nnop [31]\njmp loop [1]",  # delay does not fit
+        "loop:\njmp x-- loop\njmp loop [1]",  # delay would apply to both branches
+        ".side_set 1\nloop:\nnop side 0\njmp loop side 1",  # side-set change
+        "loop:\nnop\n.wrap\njmp loop",  # not at the wrap
+    ):
+        program = adafruit_pioasm_host.Program(source)
+        assert program.infer_wrap() == 0, source
+
+
+def test_thread_jumps() -> None:
+    program = adafruit_pioasm_host.Program(
+        """
+    .side_set 1 opt
+    start:
+        jmp !x hop1
+        jmp hop2 side 1
+    hop1:
+        jmp hop2
+    hop2:
+        jmp start
+    side_change:
+        jmp side_change2 side 1
+    side_change2:
+        jmp start
+    .wrap_target
+        jmp side_change
+        """
+    )
+    assert program.thread_jumps() == 4
+    assert [word & 0x1F for word in program.assembled] == [0, 0, 0, 0, 0, 0, 4]
+
+    # A loop of jumps is left alone
+    program = adafruit_pioasm_host.Program("a:\njmp b\nb:\njmp a\njmp a")
+    assert program.thread_jumps() == 0
+
+
+def test_thread_jumps_delay() -> None:
+    # From examples/pioasm_pulsegroup.py; the delay on "jmp count_check [1]"
+    # sets the length of each count
+    program = adafruit_pioasm_host.Program(
+        """
+    .wrap_target
+        out pins, 32
+        out y, 32
+    count_check:
+        jmp y-- delay
+    .wrap
+    delay:
+        jmp count_check [1]
+        """
+    )
+    before = list(program.assembled)
+    assert program.thread_jumps() == 0
+    assert list(program.assembled) == before
+    program.optimize(2)
+    assert program.loop_cycles("count_check") == [3]
+
+
+def test_remove_unreachable() -> None:
+    program = adafruit_pioasm_host.Program(
+        """
+        jmp over
+        nop
+        nop
+    over:
+        set x, 1
+        jmp end
+    dead:
+        jmp dead
+    public entry:
+        set y, 2
+    end:
+    .wrap_target
+        nop
+    .wrap
+        nop
+        """,
+        build_debuginfo=True,
+    )
+    assert program.remove_unreachable() == 4
+    assert list(program.assembled) == [0x0001, 0xE021, 0x0004, 0xE042, 0xA042]
+    assert program.public_labels == {"entry": 3}
+    assert (program.pio_kwargs["wrap_target"], program.pio_kwargs["wrap"]) == (4, 4)
+    assert len(program.debuginfo[0]) == 5
+
+    assert adafruit_pioasm_host.Program("out pc, 1\nnop\nnop").remove_unreachable() == 0
+
+
+def test_unroll_loops() -> None:
+    source = """
+    .side_set 1 opt
+        pull side 1 [7]
+        set x, 7 side 0 [7]
+    bitloop:
+        out pins, 1
+        jmp x-- bitloop [6]
+    """
+    program = adafruit_pioasm_host.Program(source, build_debuginfo=True)
+    assert program.unroll_loops(5) == []
+    assert program.unroll_loops(6) == [(2, 15_625_000, 15_625_000)]
+    assert list(program.assembled) == [0x9FA0, 0xF727] + [0x6701] * 8
+    assert str(program.cycle_formulas()[0]) == "80"
+    assert program.debuginfo[0] == [2, 3] + [5] * 8
+
+    program = adafruit_pioasm_host.Program(source)
+    assert program.unroll_loops(6, exact=False, system_clock=56_000_000) == [
+        (2, 7_000_000, 8_000_000)
+    ]
+    assert str(program.cycle_formulas()[0]) == "72"
+
+
+def test_unroll_loops_nop() -> None:
+    # The jmp changes the side-set pins, so it becomes a nop in each copy
+    program = adafruit_pioasm_host.Program(
+        """
+    .side_set 1
+        set y, 1 side 0
+    loop:
+        out pins, 1 side 0
+        jmp y-- loop side 1 [2]
+        set y, 3 side 0
+        """
+    )
+    assert program.unroll_loops(4) == [(1, 125_000_000 / 4, 125_000_000 / 4)]
+    assert list(program.assembled) == [0xE041, 0x6001, 0xB242, 0x6001, 0xB242, 0xE043]
+
+
+def test_unroll_loops_blocked() -> None:
+    for source in (
+        "out x, 3\nloop:\nnop\njmp x-- loop",  # unknown count
+        "set x, 3\nloop:\nmov pins, x\njmp x-- loop",  # counter read in the loop
+        "set x, 3\nloop:\nnop\njmp x-- loop\nmov pins, x",  # counter read after the loop
+        "set x, 3\nloop:\njmp pin skip\nskip:\njmp x-- loop",  # a jmp in the loop
+    ):
+        program = adafruit_pioasm_host.Program(source)
+        assert program.unroll_loops(32) == [], source
+
+    # A huge trip count is rejected without building the copies
+    program = adafruit_pioasm_host.Program("mov x, ~null\nloop:\nnop\njmp x-- loop")
+    assert program.unroll_loops(4) == []
+
+    # Without exact timing, the jmp's side-set would be lost
+    program = adafruit_pioasm_host.Program(
+        ".side_set 1\nset x, 3 side 0\nloop:\nout pins, 1 side 0\njmp x-- loop side 1"
+    )
+    assert program.unroll_loops(32, exact=False) == []
+
+
+def test_unroll_loops_nop_y() -> None:
+    # nop is mov y, y, so neither the body nor the nop after the loop uses Y
+    program = adafruit_pioasm_host.Program("set y, 2\nloop:\nnop [1]\njmp y-- loop\nnop")
+    assert program.unroll_loops(1) == [(1, 125_000_000 / 3, 125_000_000 / 3)]
+    assert list(program.assembled) == [0xE042, 0xA242, 0xA242, 0xA242, 0xA042]
+
+
+def test_unroll_loops_budget() -> None:
+    program = adafruit_pioasm_host.Program(
+        """
+        set x, 3
+    first:
+        nop
+        jmp x-- first
+        set x, 3
+    second:
+        nop
+        jmp x-- second
+        """
+    )
+    assert [address for address, _, _ in program.unroll_loops(2)] == [4]
+    assert len(program.assembled) == 8
+    assert program.unroll_loops(1) == []
+
+
+def test_promote_set_pins() -> None:
+    program = adafruit_pioasm_host.Program(
+        """
+    start:
+        pull
+        set pins, 1
+        out x, 8 [3]
+        set pins, 0
+    loop:
+        jmp x-- loop
+        set pins, 1
+        jmp start
+        """
+    )
+    assert program.promote_set_pins() == 2
+    expected = adafruit_pioasm_host.Program(
+        """
+    .side_set 1 opt
+    start:
+        pull
+        out x, 8 side 1 [3]
+        set pins, 0
+    loop:
+        jmp x-- loop
+        jmp start side 1
+        """
+    )
+    assert list(program.assembled) == list(expected.assembled)
+    assert program.pio_kwargs == expected.pio_kwargs
+
+
+def test_promote_set_pins_blocked() -> None:
+    for source in (
+        ".side_set 1\nset pins, 1\nnop",  # already uses side-set
+        "set pins, 1 [1]\nnop",  # has a delay
+        "set pins, 1\nlabel:\nnop\njmp label",  # next instruction is a jump target
+        "set pins, 1\nnop [15]",  # delay no longer fits
+        "set pindirs, 1\nnop",  # not set pins
+        "top:\nset pins, 1\nset pins, 0 [1]\njmp top",  # next instruction writes pins
+        "set pins, 1\nout pins, 1",
+        "set pins, 1\nmov pins, x",
+    ):
+        program = adafruit_pioasm_host.Program(source)
+        assert program.promote_set_pins() == 0, source
+    program = adafruit_pioasm_host.Program("set pins, 1\nset pins, 0\nnop")
+    assert program.promote_set_pins() == 1  # only the last set pins, which ends low
+    assert list(program.assembled) == [0xE001, 0xB042]
+    program = adafruit_pioasm_host.Program("set pins, 3\nnop")
+    assert program.promote_set_pins() == 1
+    assert program.pio_kwargs["sideset_pin_count"] == 1
+    assert list(program.assembled) == [0xB842]
+    program = adafruit_pioasm_host.Program(".pio_version 1\n.set 3\nset pins, 5\nnop [1]")
+    assert program.promote_set_pins() == 1
+    assert program.pio_kwargs["sideset_pin_count"] == 3
+    assert list(program.assembled) == [0xBB42]
+
+
+PIPELINE_SOURCE = """
+top:
+    set pins, 1
+    nop
+    nop [2]
+    jmp top
+unused:
+    jmp unused
+"""
+
+
+def test_optimize_levels() -> None:
+    program = adafruit_pioasm_host.Program(PIPELINE_SOURCE, optimize=1)
+    assert list(program.assembled) == [0xE401, 0x0000]
+    assert program.optimization_report.split("\n") == [
+        "remove_unreachable: 1",
+        "fold_nops: 2",
+        "instructions: 5 -> 2",
+        "loop top: 6 -> 6 cycles",
+    ]
+
+    program = adafruit_pioasm_host.Program(PIPELINE_SOURCE, optimize=2)
+    assert list(program.assembled) == [0xE401]
+    assert "loop top: 6 -> 5 cycles" in program.optimization_report
+
+    assert adafruit_pioasm_host.Program(PIPELINE_SOURCE).optimization_report is None
+
+
+def test_optimize_invalid_level() -> None:
+    with pytest.raises(ValueError):
+        adafruit_pioasm_host.Program(PIPELINE_SOURCE).optimize(3)
+
+
+def test_optimize_cycles_directive() -> None:
+    source = PIPELINE_SOURCE + ".cycles top top == 6\n"
+    adafruit_pioasm_host.Program(source, optimize=1)
+    with pytest.raises(RuntimeError, match="violating .cycles top top == 6"):
+        adafruit_pioasm_host.Program(source, optimize=2)
+
+    # Labels on removed code are dropped, and .cycles says so
+    with pytest.raises(RuntimeError, match="Label b was removed as unreachable"):
+        adafruit_pioasm_host.Program("a:\njmp a\nb:\nnop\nc:\nnop\n.cycles b c == 1", optimize=1)
@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests register constant propagation and loop bounds
+"""
+
+from test_cfg import NEOPIXEL
+from test_clock import UART_TX
+
+import adafruit_pioasm_host
+
+
+def test_register_values() -> None:
+    program = adafruit_pioasm_host.Program(
+        """
+        set x, 3
+        mov y, ~x
+        mov x, ::null
+        jmp !x zero
+        nop
+    zero:
+        set y, 1
+        jmp x!=y end
+        nop
+    end:
+        out x, 1
+        """
+    )
+    assert program.register_values() == [
+        (None, None),
+        (3, None),
+        (3, 0xFFFFFFFC),
+        (0, 0xFFFFFFFC),
+        None,
+        (0, 0xFFFFFFFC),
+        (0, 1),
+        None,
+        (0, 1),
+    ]
+
+
+def test_branch_refinement() -> None:
+    program = adafruit_pioasm_host.Program(NEOPIXEL)
+    values = program.register_values()
+    assert values[7] == (0, None)  # do_zero is only reached when x is zero
+    assert values[6] == (None, 0xFFFFFFFF)  # y-- fell through at zero
+
+
+def test_loop_bounds() -> None:
+    program = adafruit_pioasm_host.Program(UART_TX)
+    assert program.loop_bounds() == {2: 8}
+    (formula,) = program.cycle_formulas()
+    assert str(formula) == "80"
+    assert [point.min_cycles for point in program.stall_points()] == [80]
+
+    program = adafruit_pioasm_host.Program(NEOPIXEL)
+    assert program.loop_bounds() == {}
+
+
+def test_loop_bounds_nop_body() -> None:
+    # The usual delay loop: nop is mov y, y, so Y still counts the loop
+    program = adafruit_pioasm_host.Program("set y, 9\ndelay:\nnop [7]\njmp y-- delay")
+    assert program.loop_bounds() == {1: 10}
+
+
+def test_conflicting_bounds() -> None:
+    program = adafruit_pioasm_host.Program(
+        """
+        jmp pin other
+        set y, 4
+        jmp loop
+    other:
+        set y, 2
+    loop:
+        jmp y-- loop [1]
+        """
+    )
+    assert program.loop_bounds() == {}
+    assert sorted(str(f) for f in program.cycle_formulas()) == ["13", "8"]
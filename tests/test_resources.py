@@ -0,0 +1,99 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests resource extraction and conflict checking
+"""
+
+from test_cfg import NEOPIXEL
+from test_clock import UART_TX
+
+import adafruit_pioasm_host
+
+
+def test_resources() -> None:
+    resources = adafruit_pioasm_host.Program(UART_TX).resources()
+    assert resources == {
+        "instructions": 4,
+        "offset": None,
+        "pio_version": 0,
+        "irq": [],
+        "irq_set": [],
+        "irq_rel": [],
+        "irq_neighbor": [],
+        "pins": {"sideset": 1, "out": 1},
+        "jmp_pin": False,
+        "tx_fifo": True,
+        "rx_fifo": False,
+        "fifo_type": "auto",
+    }
+
+    program = adafruit_pioasm_host.Program(
+        """
+        .pio_version 1
+        .origin 4
+        .in 3 auto
+        .set 2
+        wait 1 irq 3 rel
+        irq next 1
+        irq 2
+        jmp pin 0
+        in pins, 3
+        set pindirs 1
+        """
+    )
+    resources = program.resources()
+    assert resources["offset"] == 4
+    assert resources["pio_version"] == 1
+    assert (resources["irq"], resources["irq_rel"], resources["irq_neighbor"]) == ([2], [3], [1])
+    assert resources["pins"] == {"in": 3, "set": 2}
+    assert resources["jmp_pin"]
+    assert not resources["tx_fifo"]
+    assert resources["rx_fifo"]
+
+
+def test_check_resources() -> None:
+    neopixel = adafruit_pioasm_host.Program(NEOPIXEL)
+    uart = adafruit_pioasm_host.Program(UART_TX)
+    assert not adafruit_pioasm_host.check_resources([neopixel, uart])
+    assert adafruit_pioasm_host.check_resources([neopixel] * 3) == [
+        "33 instructions do not fit in the 32 instruction slots"
+    ]
+    assert adafruit_pioasm_host.check_resources([uart] * 5) == [
+        "5 programs need more than the 4 state machines in a PIO block"
+    ]
+
+
+def test_check_conflicts() -> None:
+    programs = {
+        "a": adafruit_pioasm_host.Program(".origin 0\nirq 3\nnop"),
+        "b": adafruit_pioasm_host.Program(".origin 1\nirq wait 3"),
+        "c": adafruit_pioasm_host.Program(".origin 30\nnop\nnop\nnop"),
+    }
+    assert adafruit_pioasm_host.check_resources(programs) == [
+        "Program c at offset 30 extends past slot 31",
+        "Programs a and b overlap at offset 1",
+        "IRQ flag 3 is set by programs a, b",
+    ]
+
+
+def test_check_irq_sync() -> None:
+    # One program raises the flag and the other waits for it
+    programs = [
+        adafruit_pioasm_host.Program("irq 3\nirq clear 4"),
+        adafruit_pioasm_host.Program("wait 1 irq 3\nirq 4"),
+    ]
+    assert not adafruit_pioasm_host.check_resources(programs)
+
+
+def test_check_overlap_beyond_neighbor() -> None:
+    programs = [
+        adafruit_pioasm_host.Program(".origin 0\n" + "nop\n" * 10),
+        adafruit_pioasm_host.Program(".origin 2\nnop"),
+        adafruit_pioasm_host.Program(".origin 5\nnop"),
+    ]
+    assert adafruit_pioasm_host.check_resources(programs) == [
+        "Programs 0 and 1 overlap at offset 2",
+        "Programs 0 and 2 overlap at offset 5",
+    ]
@@ -0,0 +1,88 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests automatic side-set width selection
+"""
+
+from pytest_helpers import assert_assembles_to, assert_assembly_fails, assert_pio_kwargs
+
+import adafruit_pioasm
+import adafruit_pioasm_host
+
+
+def test_width() -> None:
+    assert_pio_kwargs(
+        ".side_set auto\nnop side 0\nnop side 1", sideset_enable=False, sideset_pin_count=1
+    )
+    assert_pio_kwargs(".side_set auto\nnop side 5\nnop", sideset_enable=True, sideset_pin_count=3)
+    assert_pio_kwargs(".side_set auto\nnop [31]", sideset_enable=False)
+    assert_pio_kwargs(
+        ".side_set auto pindirs\nnop side 1",
+        sideset_enable=False,
+        sideset_pin_count=1,
+        sideset_pindirs=True,
+    )
+
+
+def test_same_encoding() -> None:
+    source = "nop side 3 [3]\nnop side 1\nnop [2]"
+    assert_assembles_to(
+        ".side_set auto\n" + source, list(adafruit_pioasm.assemble(".side_set 2 opt\n" + source))
+    )
+
+
+def test_spill() -> None:
+    program = adafruit_pioasm_host.Program(
+        """
+    .side_set auto
+    top:
+        set pins, 1 side 1 [20]
+    .wrap_target
+        out x, 1 side 0 [31]
+    .wrap
+    public last:
+        jmp top side 1
+        """
+    )
+    assert list(program.assembled) == [
+        0xFF01,  # set pins, 1 side 1 [15]
+        0xB442,  # nop side 1 [4]
+        0x6F21,  # out x, 1 side 0 [15]
+        0xAF42,  # nop side 0 [15]
+        0x1000,  # jmp top side 1
+    ]
+    assert (program.pio_kwargs["wrap_target"], program.pio_kwargs["wrap"]) == (2, 3)
+    assert program.public_labels == {"last": 4}
+    assert [path.cycles for path in program.cycle_paths("top", 2)] == [21]
+    assert [path.cycles for path in program.cycle_paths(2, 2)] == [32]
+
+    program = adafruit_pioasm.Program(".side_set auto\nnop side 1\nnop [9]")
+    assert list(program.assembled) == [0xB842, 0xA742, 0xA142]
+
+
+def test_spill_jmp() -> None:
+    assert_assembly_fails(".side_set auto\nloop:\njmp loop side 7 [31]", match="Delay too long")
+
+
+def test_spill_numeric_target() -> None:
+    program = adafruit_pioasm.Program(".side_set auto\nnop side 1 [20]\njmp 1 side 0")
+    assert list(program.assembled) == [0xBF42, 0xB442, 0x0002]
+
+
+def test_spill_without_side_set() -> None:
+    program = adafruit_pioasm.Program(".side_set auto\nnop [40]")
+    assert list(program.assembled) == [0xBF42, 0xA842]
+    assert program.pio_kwargs == {"sideset_enable": False}
+
+
+def test_explicit_opt() -> None:
+    assert_pio_kwargs(
+        ".side_set auto opt\nnop side 0\nnop side 1", sideset_enable=True, sideset_pin_count=1
+    )
+
+
+def test_too_wide() -> None:
+    assert_assembly_fails(".side_set auto\nnop side 31\nnop", match="Side-set too wide")
+    assert_pio_kwargs(".side_set auto\nnop side 31", sideset_enable=False, sideset_pin_count=5)
@@ -0,0 +1,82 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests FIFO stall and rate analysis
+"""
+
+from test_cfg import NEOPIXEL
+
+import adafruit_pioasm_host
+
+
+def summary(program):
+    return [
+        (point.address, point.kind, point.blocking, point.min_cycles)
+        for point in program.stall_points()
+    ]
+
+
+def test_neopixel() -> None:
+    program = adafruit_pioasm_host.Program(NEOPIXEL)
+    assert summary(program) == [
+        (0, "tx", True, 2),
+        (2, "tx", True, 16),
+        (8, "tx", True, 3),
+    ]
+    assert program.fifo_rates(12_800_000) == {"tx": 6_400_000}
+
+
+def test_pdm() -> None:
+    # push iffull only transfers a word after 32 bits have been shifted in
+    program = adafruit_pioasm_host.Program(
+        """
+    .side_set 1
+        in pins 1            side 0b1
+        push iffull noblock  side 0b0
+        """
+    )
+    assert summary(program) == [(1, "rx", False, 64)]
+    assert program.fifo_rates(24000 * 2 * 32) == {"rx": 24000}
+
+
+def test_thresholds() -> None:
+    program = adafruit_pioasm_host.Program(".in 32 auto 8\nin pins, 1 [1]")
+    assert summary(program) == [(0, "rx", True, 16)]
+    program = adafruit_pioasm_host.Program(".out 32 auto 16\nout pins, 4\nout pins, 4 [1]")
+    assert summary(program) == [(0, "tx", True, 6)]
+
+
+def test_osre() -> None:
+    program = adafruit_pioasm_host.Program("pull\nloop:\nout pins, 8\njmp !osre loop [3]")
+    assert summary(program) == [(0, "tx", True, 21)]
+
+
+def test_wait_and_irq() -> None:
+    program = adafruit_pioasm_host.Program("wait 1 pin 0\nirq wait 0\npush noblock\nirq 1")
+    assert summary(program) == [
+        (0, "wait", True, None),
+        (1, "irq", True, None),
+        (2, "rx", False, 4),
+    ]
+    assert adafruit_pioasm_host.Program("pull\nstop:\njmp stop").fifo_rates(1000) == {"tx": 0}
+
+
+def test_nested_counted_loops() -> None:
+    # Thousands of register states; the search must stay fast
+    program = adafruit_pioasm_host.Program(
+        """
+        pull
+        out x, 8
+        mov y, x
+        set x, 31
+    outer:
+        set y, 31
+    inner:
+        in pins, 1
+        jmp y-- inner
+        jmp x-- outer
+        """
+    )
+    assert summary(program) == [(0, "tx", True, 2116)]
@@ -0,0 +1,130 @@
+# SPDX-FileCopyrightText: 2026 Adafruit Industries
+#
+# SPDX-License-Identifier: MIT
+
+"""
+Tests static cycle counting
+"""
+
+import contextlib
+import io
+
+import pytest
+from test_cfg import NEOPIXEL
+
+import adafruit_pioasm_host
+
+
+def test_side_set_paths() -> None:
+    program = adafruit_pioasm_host.Program(NEOPIXEL)
+    paths = {
+        (path.side_set, tuple(path.addresses), path.end): path for path in program.side_set_paths()
+    }
+    # The pulse widths documented in pioasm_neopixel_bg.py
+    zero_high = paths[(1, (4,), 7)]
+    assert zero_high.cycles == 4
+    assert zero_high.nanoseconds(12_800_000) == 312.5
+    assert zero_high.data_dependent
+    one_high = paths[(1, (4, 5), 2)]
+    assert one_high.cycles == 9
+    zero_low = paths[(0, (7, 2, 3), 4)]
+    assert zero_low.cycles == 12
+    assert zero_low.stalls == [2]
+    one_low = paths[(0, (2, 3), 4)]
+    assert one_low.cycles == 7
+    assert not one_low.data_dependent
+
+
+def test_cycle_paths() -> None:
+    program = adafruit_pioasm_host.Program(NEOPIXEL)
+    paths = program.cycle_paths("bitloop", "bitloop")
+    assert sorted(path.cycles for path in paths) == [16, 16, 21, 22]
+    assert all(path.data_dependent for path in paths)
+
+    paths = program.cycle_paths("end_sequence")
+    assert [(path.addresses, path.end, path.cycles) for path in paths] == [([8, 9], 10, 2)]
+
+
+def test_wrap_and_end() -> None:
+    program = adafruit_pioasm_host.Program("set x, 1 [3]\n.wrap_target\nnop [1]\n.wrap")
+    assert [(p.addresses, p.end, p.cycles) for p in program.cycle_paths()] == [
+        ([0], 1, 4),
+        ([1], 1, 2),
+    ]
+    program = adafruit_pioasm_host.Program("nop\n.wrap\nend:\nnop\nnop [2]")
+    assert [(p.addresses, p.end) for p in program.cycle_paths("end")] == [([1, 2], None)]
+
+
+def test_print_cycle_paths() -> None:
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        adafruit_pioasm_host.Program(NEOPIXEL).print_cycle_paths(12_800_000)
+    assert "312.5" in output.getvalue()
+
+
+def test_cycle_formulas() -> None:
+    # The delay loop from pioasm_background_morse.py
+    program = adafruit_pioasm_host.Program(
+        """
+        out x, 1
+        mov pins, x
+        out x, 15
+    busy_wait:
+        jmp x--, busy_wait [31]
+        """
+    )
+    (formula,) = program.cycle_formulas()
+    assert str(formula) == "32*x + 35"
+    assert formula.terms == [("x", 32, 2)]
+    assert formula.cycles(4000) == 128035
+    assert formula.solve(128035) == 4000
+
+    # The delay loop from pioasm_pulsegroup.py
+    program = adafruit_pioasm_host.Program(
+        """
+    .wrap_target
+        out pins, 32
+        out y, 32
+    count_check:
+        jmp y-- delay
+    .wrap
+    delay:
+        jmp count_check [1]
+        """
+    )
+    (formula,) = program.cycle_formulas()
+    assert str(formula) == "3*y + 3"
+    assert formula.solve(300) == 99
+    with pytest.raises(ValueError):
+        formula.solve(301)
+
+
+def test_cycle_formulas_uncounted() -> None:
+    program = adafruit_pioasm_host.Program(NEOPIXEL)
+    formulas = program.cycle_formulas("bitloop", "end_sequence")
+    assert sorted(f.constant for f in formulas) == [16, 17]
+    assert all(not f.terms for f in formulas)
+    assert all(f.data_dependent for f in formulas)
+    # bitloop goes around once per bit, which the formula cannot count
+    formulas = program.cycle_formulas()
+    assert sorted(str(f) for f in formulas) == ["1*y + 21", "1*y + 22"]
+    assert all(f.data_dependent for f in formulas)
+
+    # A second exit means the loop is not counted, even with a constant counter
+    program = adafruit_pioasm_host.Program(
+        "set x, 3\nloop:\njmp pin done\njmp x-- loop\ndone:\nnop"
+    )
+    (formula,) = program.cycle_formulas()
+    assert formula.constant == 3
+    assert formula.data_dependent
+    assert "data dependent" in repr(formula)
+
+
+def test_cycle_formulas_nop_body() -> None:
+    # nop is mov y, y, which leaves the Y counter alone
+    program = adafruit_pioasm_host.Program("pull\nout y, 32\nloop:\nnop [3]\njmp y-- loop")
+    assert [str(f) for f in program.cycle_formulas()] == ["5*y + 7"]
+    program = adafruit_pioasm_host.Program("set y, 5\nb:\nnop\njmp y-- b")
+    (formula,) = program.cycle_formulas()
+    assert str(formula) == "13"
+    assert not formula.data_dependent